@@ -0,0 +1,306 @@
+"""
+Нагрузочный бенчмарк API авторизации и управления пользователями.
+
+Создаёт временную SQLite-базу, заполняет её N пользователями и прогоняет сценарии
+против приложения из main.py — в том же процессе (ASGI transport) и/или через uvicorn на localhost.
+Результаты (RPS, p50/p95/p99) печатаются таблицей и сохраняются в JSON, чтобы сравнивать прогоны между релизами.
+
+Запуск из корня репозитория (нужен httpx: pip install -r benchmarks/requirements.txt):
+    python benchmarks/bench_api.py --users 10000 --mode both --duration 10 --concurrency 32 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_USERNAME = "bench_superadmin"
+SEED_CHUNK_SIZE = 1000
+
+
+def configure_environment(db_path: Path):
+    # modules.db.database читает настройки при импорте, поэтому окружение задаётся до импорта приложения
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("DB_ECHO", "false")
+    # суперадмин создаётся в seed_users, при старте приложение находит его и не создаёт заново
+    os.environ.setdefault("SUPER_ADMIN_USERNAME", ADMIN_USERNAME)
+    os.environ.setdefault("SUPER_ADMIN_PASSWORD", BENCH_PASSWORD)
+    # все запросы бенчмарка идут с одного IP — ограничение попыток входа по IP мешало бы сценарию login_storm
+    os.environ.setdefault("RATE_LIMIT_AUTH_IP_RATE", "1000000")
+    os.environ.setdefault("RATE_LIMIT_AUTH_IP_BURST", "1000000")
+    os.environ.setdefault("RATE_LIMIT_AUTH_IP_MAX_FAILURES", "1000000")
+    # deep_offset_paging должен мерить сам OFFSET-запрос, а не попадания в кэш готовых страниц
+    os.environ.setdefault("PAGE_CACHE_SIZE", "0")
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+
+def seeded_username(i: int) -> str:
+    return f"user{i}"
+
+
+async def seed_users(count: int) -> float:
+    from sqlalchemy import insert
+
+    from models.db_models import UsersOrm
+    from modules.db.database import engine, metadata_obj
+    from modules.db.queryes import add_new_user, session_factory
+    from modules.secrets_manager import hash_password
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata_obj.create_all)
+
+    await add_new_user(ADMIN_USERNAME, BENCH_PASSWORD, "superadmin")
+
+    # Тот же многострочный INSERT, что и в add_new_users_bulk, но с одним общим хешем:
+    # bcrypt для миллиона пользователей занял бы несколько суток
+    hashed = hash_password(BENCH_PASSWORD)
+    for start in range(0, count, SEED_CHUNK_SIZE):
+        rows = [
+            {
+                "username": seeded_username(i),
+                "password": hashed,
+                "email": f"{seeded_username(i)}@example.com",
+                "role": "admin" if i % 10 == 0 else "user",
+            }
+            for i in range(start, min(start + SEED_CHUNK_SIZE, count))
+        ]
+        async with session_factory() as session:
+            await session.execute(insert(UsersOrm).values(rows))
+            await session.commit()
+
+    await engine.dispose()
+    return time.perf_counter() - started
+
+
+# СЦЕНАРИИ: одна итерация = один HTTP-запрос
+
+async def login_storm(client, ctx, rng, state):
+    username = seeded_username(rng.randrange(ctx["users"]))
+    return await client.post("/api/auth", json={"username": username, "password": BENCH_PASSWORD})
+
+async def authorized_reads(client, ctx, rng, state):
+    username = seeded_username(rng.randrange(ctx["users"]))
+    return await client.get("/api/users/get_user", params={"username": username}, headers=ctx["headers"])
+
+async def deep_offset_paging(client, ctx, rng, state):
+    offset = rng.randrange(int(ctx["users"] * 0.9), ctx["users"] + 1)
+    return await client.get("/api/users/get_list", params={"offset": offset, "limit": 100}, headers=ctx["headers"])
+
+async def cursor_paging(client, ctx, rng, state):
+    params = {"limit": 100}
+    if state.get("cursor"):
+        params["cursor"] = state["cursor"]
+    response = await client.get("/api/users/get_page", params=params, headers=ctx["headers"])
+    state["cursor"] = response.json().get("next_cursor") if response.status_code == 200 else None
+    return response
+
+async def mixed_read_write(client, ctx, rng, state):
+    roll = rng.random()
+    if roll < 0.8:
+        return await authorized_reads(client, ctx, rng, state)
+    if roll < 0.9:
+        return await client.get("/api/users/get_list", params={"limit": 100}, headers=ctx["headers"])
+    i = rng.randrange(ctx["users"])
+    return await client.patch(
+        "/api/users/edit_user",
+        json={"username": seeded_username(i), "email": f"changed{rng.randrange(10**6)}@example.com"},
+        headers=ctx["headers"],
+    )
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "authorized_reads": authorized_reads,
+    "deep_offset_paging": deep_offset_paging,
+    "cursor_paging": cursor_paging,
+    "mixed_read_write": mixed_read_write,
+}
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario, ctx, duration: float, max_requests: int | None, concurrency: int) -> dict:
+    latencies = []
+    statuses = Counter()
+    errors = Counter()
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(worker_id: int):
+        nonlocal issued
+        rng = random.Random(worker_id)
+        state = {}
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx, rng, state)
+                statuses[response.status_code] += 1
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+
+
+async def run_scenarios(client, args) -> dict:
+    response = await client.post("/api/auth", json={"username": ADMIN_USERNAME, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    ctx = {"users": args.users, "headers": {"x-api-token": response.json()["x_api_token"]}}
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(client, SCENARIOS[name], ctx, args.duration, args.requests, args.concurrency)
+        print_result(args.current_mode, name, results[name])
+    return results
+
+
+async def run_asgi(args) -> dict:
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_scenarios(client, args)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.perf_counter() + 30
+            while True:
+                try:
+                    if (await client.get("/docs")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn не запустился")
+                await asyncio.sleep(0.1)
+            return await run_scenarios(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def print_result(mode: str, name: str, result: dict):
+    latency = result["latency_ms"]
+    print(
+        f"{mode:8} {name:20} {result['requests']:8d} req  {result['throughput_rps']:9.1f} rps  "
+        f"p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  p99 {latency['p99']:8.2f} ms  "
+        f"codes {result['status_codes']} {result['errors'] or ''}"
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="Сколько пользователей создать (10k — 1M)")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn", "both"], default="asgi")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10, help="Длительность каждого сценария, сек")
+    parser.add_argument("--requests", type=int, default=None, help="Ограничить число запросов в сценарии")
+    parser.add_argument("--concurrency", type=int, default=32, help="Количество одновременных клиентов")
+    parser.add_argument("--output", default=None, help="Куда сохранить JSON с результатами ('-' — stdout)")
+    parser.add_argument("--db-dir", default=None, help="Каталог для временной базы (по умолчанию системный tmp)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as tmp:
+        configure_environment(Path(tmp) / "bench.db")
+
+        seed_time = asyncio.run(seed_users(args.users))
+        print(f"Создано {args.users} пользователей за {seed_time:.1f} с")
+
+        modes = ["asgi", "uvicorn"] if args.mode == "both" else [args.mode]
+        results = {}
+        for mode in modes:
+            args.current_mode = mode
+            runner = run_asgi if mode == "asgi" else run_uvicorn
+            results[mode] = asyncio.run(runner(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "users": args.users,
+            "seed_time_s": seed_time,
+            "duration_s": args.duration,
+            "max_requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    elif args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Бенчмарк схем хеширования паролей на текущей машине.
+
+Для каждой схемы и стоимости замеряет время одного хеша и пропускную способность
+(хешей в секунду) в одном потоке и в пуле из --threads потоков, как в PasswordHashingService.
+Проверка пароля при входе стоит столько же, сколько хеширование, поэтому hashes/s в пуле —
+это потолок входов в секунду на один процесс. Контексты строятся той же функцией build_pwd_context,
+что и в приложении, поэтому найденные параметры переносятся в BCRYPT_ROUNDS / ARGON2_* как есть.
+
+argon2 замеряется, только если установлен argon2-cffi.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_hash.py --bcrypt-rounds 10 11 12 13 --argon2-time-cost 2 3 --duration 3 --output hash.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_api import ROOT, git_revision
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BENCH_PASSWORD = "Strong_Password_123%"
+
+
+def configurations(args) -> list[dict]:
+    configs = [{"scheme": "bcrypt", "cost": f"rounds={rounds}", "settings": {"bcrypt_rounds": rounds}} for rounds in args.bcrypt_rounds]
+    for time_cost in args.argon2_time_cost:
+        for memory_cost in args.argon2_memory_cost:
+            configs.append({
+                "scheme": "argon2",
+                "cost": f"t={time_cost},m={memory_cost}KiB,p={args.argon2_parallelism}",
+                "settings": {
+                    "argon2_time_cost": time_cost,
+                    "argon2_memory_cost": memory_cost,
+                    "argon2_parallelism": args.argon2_parallelism,
+                },
+            })
+    return configs
+
+
+def measure(context, threads: int, duration: float) -> float:
+    """Хешей в секунду при threads параллельных потоках."""
+    deadline = time.perf_counter() + duration
+
+    def worker() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            context.hash(BENCH_PASSWORD)
+            done += 1
+        return done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        done = sum(future.result() for future in [executor.submit(worker) for _ in range(threads)])
+    return done / (time.perf_counter() - started)
+
+
+def run(config: dict, threads: int, duration: float) -> dict:
+    from passlib.exc import MissingBackendError
+
+    from modules.secrets_manager import build_pwd_context
+
+    context = build_pwd_context([config["scheme"]], **config["settings"])
+    try:
+        started = time.perf_counter()
+        hashed = context.hash(BENCH_PASSWORD)
+        first_hash_ms = (time.perf_counter() - started) * 1000
+    except MissingBackendError as e:
+        return {"scheme": config["scheme"], "cost": config["cost"], "skipped": str(e)}
+
+    single = measure(context, 1, duration)
+    pooled = measure(context, threads, duration) if threads > 1 else single
+    return {
+        "scheme": config["scheme"],
+        "cost": config["cost"],
+        "settings": config["settings"],
+        "hash_prefix": hashed[:hashed.rfind("$") + 1],
+        "first_hash_ms": first_hash_ms,
+        "hash_ms": 1000 / single,
+        "hashes_per_s_single": single,
+        "hashes_per_s_pool": pooled,
+        "threads": threads,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 11, 12, 13], help="Стоимости bcrypt (log2 итераций)")
+    parser.add_argument("--argon2-time-cost", type=int, nargs="*", default=[2, 3], help="Число проходов argon2")
+    parser.add_argument("--argon2-memory-cost", type=int, nargs="*", default=[19456, 65536], help="Память argon2, КиБ")
+    parser.add_argument("--argon2-parallelism", type=int, default=1, help="Число потоков внутри одного хеша argon2")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Размер пула потоков (как HASH_WORKERS)")
+    parser.add_argument("--duration", type=float, default=3, help="Длительность замера для каждой конфигурации, сек")
+    parser.add_argument("--output", default=None, help="Куда сохранить JSON с результатами ('-' — stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = []
+    for config in configurations(args):
+        result = run(config, args.threads, args.duration)
+        results.append(result)
+        if "skipped" in result:
+            print(f"{result['scheme']:7} {result['cost']:28} пропущено: {result['skipped']}")
+            continue
+        print(
+            f"{result['scheme']:7} {result['cost']:28} {result['hash_ms']:8.1f} ms/hash  "
+            f"{result['hashes_per_s_single']:8.1f} hashes/s (1 поток)  "
+            f"{result['hashes_per_s_pool']:8.1f} hashes/s ({args.threads} потоков)"
+        )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "threads": args.threads,
+            "duration_s": args.duration,
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    elif args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Микробенчмарк накладных расходов на построение запросов в modules/db/queryes.py.
+
+Сравнивает прежний способ (новый select() и ORM-объекты на каждый вызов) с заранее собранными
+запросами со связанными параметрами, которые возвращают строки вместо ORM-объектов:
+  - build — только построение запроса и его ключа кеша компиляции, без обращения к БД;
+  - call  — полный вызов get_all_users / get_user_data против временной SQLite-базы.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_queries.py --users 10000 --iterations 2000 --output queries.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_api import configure_environment, git_revision, seed_users, seeded_username
+
+
+def legacy_list_stmt(role, order_by, order_desc, offset, limit):
+    from sqlalchemy import select
+
+    from models.db_models import UsersOrm
+
+    stmt = select(*[col for col in UsersOrm.__table__.columns if col.name != 'password'])
+    if role is not None:
+        stmt = stmt.where(UsersOrm.role == role)
+    order_col = UsersOrm.id
+    if order_by == "username":
+        order_col = UsersOrm.username
+    elif order_by == "role":
+        order_col = UsersOrm.role
+    stmt = stmt.order_by(order_col.desc() if order_desc else order_col)
+    return stmt.offset(offset).limit(min(limit, 100))
+
+
+def legacy_user_stmt(username):
+    from sqlalchemy import select
+
+    from models.db_models import UsersOrm
+
+    return select(UsersOrm).where(UsersOrm.username == username)
+
+
+async def legacy_get_all_users(role, order_by, order_desc, offset, limit):
+    from modules.db.queryes import read_session_factory
+
+    async with read_session_factory() as session:
+        result = await session.execute(legacy_list_stmt(role, order_by, order_desc, offset, limit))
+        return [row._asdict() for row in result.fetchall()]
+
+
+async def legacy_get_user_data(username):
+    from modules.db.queryes import read_session_factory
+
+    async with read_session_factory() as session:
+        return (await session.execute(legacy_user_stmt(username))).scalar_one_or_none()
+
+
+def list_args(i: int, users: int) -> tuple:
+    order_by = ("id", "username", "role")[i % 3]
+    role = "user" if i % 2 else None
+    return role, order_by, bool(i % 4 < 2), (i * 37) % max(users - 100, 1), 100
+
+
+def measure_sync(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def measure_async(fn, iterations: int) -> float:
+    await fn(0)
+    started = time.perf_counter()
+    for i in range(iterations):
+        await fn(i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def run_build(iterations: int, users: int) -> dict:
+    from modules.db.queryes import USER_BY_USERNAME_STMT, _users_list_stmt
+
+    def legacy_list(i):
+        legacy_list_stmt(*list_args(i, users))._generate_cache_key()
+
+    def prebuilt_list(i):
+        role, order_by, order_desc, _, _ = list_args(i, users)
+        _users_list_stmt(role is not None, order_by, order_desc)._generate_cache_key()
+
+    def legacy_user(i):
+        legacy_user_stmt(seeded_username(i % users))._generate_cache_key()
+
+    def prebuilt_user(i):
+        USER_BY_USERNAME_STMT._generate_cache_key()
+
+    return {
+        "get_all_users": {"legacy_us": measure_sync(legacy_list, iterations), "prebuilt_us": measure_sync(prebuilt_list, iterations)},
+        "get_user_data": {"legacy_us": measure_sync(legacy_user, iterations), "prebuilt_us": measure_sync(prebuilt_user, iterations)},
+    }
+
+
+async def run_calls(iterations: int, users: int) -> dict:
+    from modules.db.database import engine
+    from modules.db.queryes import get_all_users, get_user_data
+
+    async def legacy_list(i):
+        await legacy_get_all_users(*list_args(i, users))
+
+    async def prebuilt_list(i):
+        role, order_by, order_desc, offset, limit = list_args(i, users)
+        await get_all_users(limit=limit, offset=offset, role=role, order_by=order_by, order_desc=order_desc)
+
+    async def legacy_user(i):
+        await legacy_get_user_data(seeded_username(i % users))
+
+    async def prebuilt_user(i):
+        await get_user_data(seeded_username(i % users))
+
+    results = {
+        "get_all_users": {"legacy_us": await measure_async(legacy_list, iterations), "prebuilt_us": await measure_async(prebuilt_list, iterations)},
+        "get_user_data": {"legacy_us": await measure_async(legacy_user, iterations), "prebuilt_us": await measure_async(prebuilt_user, iterations)},
+    }
+    await engine.dispose()
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="Сколько пользователей создать")
+    parser.add_argument("--iterations", type=int, default=2000, help="Сколько вызовов на каждый замер")
+    parser.add_argument("--output", default=None, help="Куда сохранить JSON с результатами ('-' — stdout)")
+    parser.add_argument("--db-dir", default=None, help="Каталог для временной базы (по умолчанию системный tmp)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as tmp:
+        configure_environment(Path(tmp) / "bench.db")
+        # сравниваются одинаковые запросы к БД, фильтр существования username отключён
+        os.environ["MEMBERSHIP_FILTER_ENABLED"] = "false"
+
+        asyncio.run(seed_users(args.users))
+        results = {
+            "build": run_build(args.iterations, args.users),
+            "call": asyncio.run(run_calls(args.iterations, args.users)),
+        }
+
+    for kind, functions in results.items():
+        for name, result in functions.items():
+            result["saved_us"] = result["legacy_us"] - result["prebuilt_us"]
+            print(
+                f"{kind:6} {name:14} legacy {result['legacy_us']:9.1f} us  "
+                f"prebuilt {result['prebuilt_us']:9.1f} us  saved {result['saved_us']:9.1f} us/call"
+            )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    elif args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
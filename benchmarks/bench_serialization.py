@@ -0,0 +1,134 @@
+"""
+Бенчмарк сериализации ответа /api/users/get_list.
+
+Сравнивает стандартный путь FastAPI (валидация строк через response_model list[UserDataResponse],
+включая EmailStr, и JSONResponse) с быстрым путём FAST_SERIALIZATION_ENABLED (TrustedJSONResponse
+из modules/serialization.py) — с orjson, если он установлен, и со стандартным json.
+Перед замером проверяет, что все варианты выдают одинаковые байты.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_serialization.py --rows 100 --iterations 2000 --output serialization.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_api import ROOT, git_revision
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def make_rows(count: int) -> list:
+    from sqlalchemy import create_engine, insert, select
+
+    from models.db_models import UsersOrm
+    from modules.db.database import metadata_obj
+    from modules.db.queryes import USER_LIST_COLUMNS
+
+    roles = ("user", "admin", "superadmin")
+    sync_engine = create_engine("sqlite://")
+    metadata_obj.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(insert(UsersOrm), [
+            {
+                "username": f"пользователь_{i}" if i % 5 == 0 else f"user{i}",
+                "password": "x",
+                "email": f"user{i}@example.com" if i % 3 else None,
+                "role": roles[i % 3],
+            }
+            for i in range(count)
+        ])
+        rows = conn.execute(select(*USER_LIST_COLUMNS).order_by(UsersOrm.id)).all()
+    sync_engine.dispose()
+    return rows
+
+
+def get_list_response_field():
+    from modules.routers.main_routers import main_router
+
+    return next(route.response_field for route in main_router.routes if route.path.endswith("/get_list"))
+
+
+async def fastapi_render(field, rows) -> bytes:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    return JSONResponse(await serialize_response(field=field, response_content=rows)).body
+
+
+def fast_render(rows) -> bytes:
+    from modules.serialization import TrustedJSONResponse, user_row_to_dict
+
+    return TrustedJSONResponse([user_row_to_dict(row) for row in rows]).body
+
+
+async def run(rows: list, iterations: int) -> dict:
+    import modules.serialization as serialization
+
+    field = get_list_response_field()
+    encoders = {"orjson": serialization.orjson, "json": None}
+    if serialization.orjson is None:
+        encoders.pop("orjson")
+
+    reference = await fastapi_render(field, rows)
+    for name, module in encoders.items():
+        serialization.orjson = module
+        if fast_render(rows) != reference:
+            raise SystemExit(f"Быстрый путь ({name}) выдаёт другие байты, чем FastAPI")
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fastapi_render(field, rows)
+    results = {"fastapi": (time.perf_counter() - started) / iterations * 1e6}
+
+    for name, module in encoders.items():
+        serialization.orjson = module
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fast_render(rows)
+        results[f"fast_{name}"] = (time.perf_counter() - started) / iterations * 1e6
+    return {"per_response_us": results, "bytes": len(reference)}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="Сколько строк в ответе (get_list отдаёт до 100)")
+    parser.add_argument("--iterations", type=int, default=2000, help="Сколько ответов сериализовать на каждый замер")
+    parser.add_argument("--output", default=None, help="Куда сохранить JSON с результатами ('-' — stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(run(make_rows(args.rows), args.iterations))
+
+    baseline = result["per_response_us"]["fastapi"]
+    for name, value in result["per_response_us"].items():
+        print(f"{name:12} {value:9.1f} us/response  x{baseline / value:5.1f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": args.rows,
+            "iterations": args.iterations,
+        },
+        "results": result,
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    elif args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Бенчмарк холодного старта приложения.
+
+1. Профиль импорта: запускает `python -X importtime -c "import main"` и печатает модули,
+   которые дольше всего импортируются (по суммарному и собственному времени).
+2. Холодный старт до первого 200: запускает `python main.py` с новой пустой SQLite-базой
+   и замеряет время от запуска процесса до первого успешного входа суперадмина в /api/auth
+   (импорт, создание схемы, создание суперадмина, один bcrypt). Медиана сравнивается с бюджетом,
+   при превышении скрипт завершается с кодом 1 — его можно запускать в CI.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py --runs 5 --budget 3 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_api import ROOT, free_port, git_revision
+
+ADMIN_USERNAME = "startup_superadmin"
+ADMIN_PASSWORD = "startup-password"
+STARTUP_TIMEOUT = 60
+
+
+def app_environment(db_path: Path) -> dict:
+    return {
+        **os.environ,
+        "SQLALCHEMY_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "SUPER_ADMIN_USERNAME": ADMIN_USERNAME,
+        "SUPER_ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "APP_WORKERS": "1",
+    }
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def profile_imports(top: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_environment(Path(tmp) / "import.db")
+        command = [sys.executable, "-X", "importtime", "-c", "import main"]
+        # первый прогон прогревает __pycache__, замеряется второй
+        subprocess.run(command, cwd=ROOT, env=env, capture_output=True)
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"Не удалось импортировать main:\n{result.stderr[-2000:]}")
+
+    modules = parse_importtime(result.stderr)
+    main_module = next(module for module in modules if module["module"] == "main")
+    # модули, импортированные непосредственно из main, и из этих модулей
+    direct = [module for module in modules if module["depth"] in (1, 2)]
+    return {
+        "process_wall_ms": wall_ms,
+        "import_main_ms": main_module["cumulative_ms"],
+        "top_cumulative": sorted(direct, key=lambda module: module["cumulative_ms"], reverse=True)[:top],
+        "top_self": sorted(modules, key=lambda module: module["self_ms"], reverse=True)[:top],
+    }
+
+
+def wait_for_first_200(port: int, server: subprocess.Popen) -> float:
+    request_body = json.dumps({"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}).encode()
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Сервер завершился до первого ответа")
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/api/auth",
+            data=request_body,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"Нет ответа 200 за {STARTUP_TIMEOUT} с")
+
+
+def cold_start() -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "main.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1"],
+            cwd=ROOT,
+            env=app_environment(Path(tmp) / "startup.db"),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            return wait_for_first_200(port, server) - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Сколько холодных стартов замерить")
+    parser.add_argument("--budget", type=float, default=3.0, help="Бюджет на медиану холодного старта до первого 200, сек")
+    parser.add_argument("--top", type=int, default=15, help="Сколько самых медленных модулей показать")
+    parser.add_argument("--output", default=None, help="Куда сохранить JSON с результатами ('-' — stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    imports = profile_imports(args.top)
+    print(f"import main: {imports['import_main_ms']:.0f} ms (процесс целиком {imports['process_wall_ms']:.0f} ms)")
+    print("Дольше всего (с учётом вложенных импортов):")
+    for module in imports["top_cumulative"]:
+        print(f"  {module['cumulative_ms']:8.1f} ms  {'  ' * (module['depth'] - 1)}{module['module']}")
+    print("Дольше всего (собственное время модуля):")
+    for module in imports["top_self"]:
+        print(f"  {module['self_ms']:8.1f} ms  {module['module']}")
+
+    starts = [cold_start() for _ in range(args.runs)]
+    median = statistics.median(starts)
+    within_budget = median <= args.budget
+    print(
+        f"Холодный старт до первого 200: медиана {median:.2f} с, мин {min(starts):.2f} с, макс {max(starts):.2f} с "
+        f"(бюджет {args.budget:.2f} с — {'уложились' if within_budget else 'ПРЕВЫШЕН'})"
+    )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "runs": args.runs,
+            "budget_s": args.budget,
+        },
+        "imports": imports,
+        "cold_start_s": {"runs": starts, "median": median, "within_budget": within_budget},
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    elif args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Результаты сохранены в {args.output}")
+
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
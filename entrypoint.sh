@@ -1,3 +1,2 @@
 #!/bin/sh
-python init_app.py
-exec python main.py --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec python main.py --host 0.0.0.0 --port 8000 --workers "${APP_WORKERS:-1}"
@@ -1,24 +1,163 @@
-import uvicorn
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
-from modules.db.database import engine, metadata_obj
-from modules.routers.main_routers import main_router, auth_router
+from modules.db.database import engine, read_engine, metadata_obj, describe_engine, copy_sqlite_replica, SQLITE_REPLICA_COPY_ON_START
+from modules.db.jobs import purge_expired_tokens_periodically
+from modules.db.membership import membership_filters
+from modules.db.migrations import upgrade_schema
+from modules.db.queryes import add_new_user, get_user_data
+from modules.hashing_service import hashing_service, HashingServiceBusy
+from modules.shared_state import file_lock
+from modules.metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine
+from modules.audit import audit_log
+from modules.routers.main_routers import main_router, auth_router, service_router, audit_router, metrics_router
+
+APP_WORKERS = int(os.getenv("APP_WORKERS", 1))
+APP_GRACEFUL_TIMEOUT = float(os.getenv("APP_GRACEFUL_TIMEOUT", 30))
+# Адреса прокси, которым доверяется X-Forwarded-For: от него зависят лимиты входа по IP
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+SUPER_ADMIN_USERNAME = os.getenv("SUPER_ADMIN_USERNAME")
+SUPER_ADMIN_PASSWORD = os.getenv("SUPER_ADMIN_PASSWORD")
+
+logger = logging.getLogger("uvicorn.error")
+
+async def bootstrap_superadmin():
+    if not SUPER_ADMIN_USERNAME or not SUPER_ADMIN_PASSWORD:
+        logger.error("Ошибка: SUPER_ADMIN_USERNAME и SUPER_ADMIN_PASSWORD должны быть заданы!")
+        return
+
+    try:
+        user_data = await get_user_data(SUPER_ADMIN_USERNAME, use_primary=True)
+        if user_data and user_data.role == "superadmin":
+            return
+
+        await add_new_user(
+            username=SUPER_ADMIN_USERNAME,
+            password=SUPER_ADMIN_PASSWORD,
+            role="superadmin"
+        )
+        logger.info("Суперадмин '%s' успешно создан.", SUPER_ADMIN_USERNAME)
+    except Exception:
+        logger.exception("ОШИБКА СОЗДАНИЯ СУПЕРАДМИНА В БАЗЕ ДАННЫХ!")
+
+def schema_lock_path() -> str:
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        return f"{os.path.abspath(database)}.lock"
+    digest = hashlib.sha256(engine.url.render_as_string(hide_password=False).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"test-task-schema-{digest}.lock")
+
+async def prepare_database():
+    # при запуске через `uvicorn main:app --workers N` схему готовит каждый воркер:
+    # блокировка не даёт им одновременно создавать таблицы, триггеры и суперадмина
+    with file_lock(schema_lock_path()):
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata_obj.create_all)
+        await upgrade_schema(engine)
+        await bootstrap_superadmin()
+
+    if read_engine is not engine and SQLITE_REPLICA_COPY_ON_START:
+        await asyncio.to_thread(copy_sqlite_replica)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(metadata_obj.create_all)
+    logger.info("Database engine: %s", describe_engine(engine))
+    if read_engine is not engine:
+        logger.info("Read replica engine: %s", describe_engine(read_engine))
+
+    # при запуске нескольких воркеров схему и суперадмина один раз создаёт главный процесс (см. run_server)
+    if os.getenv("APP_SCHEMA_READY") != "1":
+        await prepare_database()
+
+    audit_log.start()
+    background_tasks = [asyncio.create_task(purge_expired_tokens_periodically())]
+    if membership_filters.enabled:
+        # фильтры строятся в фоне, чтобы не задерживать готовность к первому запросу
+        background_tasks.append(asyncio.create_task(membership_filters.rebuild_periodically(rebuild_first=True)))
 
     yield
 
+    for task in background_tasks:
+        task.cancel()
+    await audit_log.stop(timeout=APP_GRACEFUL_TIMEOUT)
+    hashing_service.shutdown()
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(main_router)
 app.include_router(auth_router)
+app.include_router(service_router)
+app.include_router(audit_router)
+
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
+
+@app.exception_handler(HashingServiceBusy)
+async def hashing_service_busy_handler(request: Request, exc: HashingServiceBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Password hashing service is overloaded, try again later!"},
+        headers={"Retry-After": "1"},
+    )
+
+
+def run_server(host: str, port: int, workers: int, graceful_timeout: float):
+    import uvicorn
+
+    options = dict(
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=graceful_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+    )
+    if workers <= 1:
+        uvicorn.run(app, **options)
+        return
+
+    # Воркеры запускаются заново через spawn и наследуют окружение: схема уже создана,
+    # а кэши процессов синхронизируются через общий файл счётчиков поколений
+    asyncio.run(prepare_database())
+    asyncio.run(engine.dispose())
+    os.environ["APP_SCHEMA_READY"] = "1"
+
+    temporary_state_path = None
+    if not os.getenv("APP_SHARED_STATE_PATH"):
+        temporary_state_path = os.path.join(tempfile.gettempdir(), f"test-task-{os.getpid()}.state")
+        os.environ["APP_SHARED_STATE_PATH"] = temporary_state_path
+    try:
+        uvicorn.run("main:app", workers=workers, **options)
+    finally:
+        if temporary_state_path is not None and os.path.exists(temporary_state_path):
+            os.remove(temporary_state_path)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Запуск API-сервера")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=APP_WORKERS, help="Количество процессов uvicorn")
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=APP_GRACEFUL_TIMEOUT,
+        help="Сколько секунд ждать завершения активных запросов при остановке или перезапуске воркера",
+    )
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.workers, args.graceful_timeout)
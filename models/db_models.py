@@ -1,9 +1,11 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import MetaData
+from sqlalchemy import DDL, JSON, MetaData, ForeignKey, Index, String, event
 
 from modules.db.database import metadata_obj
 
+from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 class UserRole(str, Enum):
     user = "user"
@@ -21,4 +23,83 @@ class UsersOrm(Base):
     password: Mapped[str]
     email: Mapped[str] = mapped_column(nullable=True)
     role: Mapped[UserRole] = mapped_column(default=UserRole.user)
-    token: Mapped[str] = mapped_column(nullable=True)
+    # увеличивается при каждом изменении пользователя, используется в ETag
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+
+    # username уже проиндексирован ограничением unique.
+    # AUTOINCREMENT: id удалённых пользователей не выдаются повторно (догрузка фильтров по id, ETag "{id}-{version}")
+    __table_args__ = (
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_role_username", "role", "username"),
+        {"sqlite_autoincrement": True},
+    )
+
+class UserTokensOrm(Base):
+    __tablename__ = 'user_tokens'
+    metadata = metadata_obj
+    id: Mapped[int] = mapped_column(primary_key=True)
+    token_digest: Mapped[str] = mapped_column(String(64), unique=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    created_at: Mapped[datetime]
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class TableRevisionsOrm(Base):
+    """Счётчик изменений таблицы: увеличивается триггером в той же транзакции, что и запись в неё (ETag и кэш списков)."""
+    __tablename__ = 'table_revisions'
+    metadata = metadata_obj
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    revision: Mapped[int] = mapped_column(default=0)
+
+event.listen(
+    TableRevisionsOrm.__table__,
+    "after_create",
+    DDL("INSERT INTO table_revisions (name, revision) VALUES ('users', 0)"),
+)
+
+# Счётчик users увеличивают триггеры: запись пользователя остаётся одной командой.
+# Смена только пароля (перехеширование при входе) на списки не влияет и счётчик не трогает.
+_BUMP_USERS_REVISION = "UPDATE table_revisions SET revision = revision + 1 WHERE name = 'users';"
+USERS_REVISION_TRIGGERS = [
+    *(
+        DDL(
+            f"CREATE TRIGGER IF NOT EXISTS users_revision_{name} AFTER {event_name} ON users "
+            f"BEGIN {_BUMP_USERS_REVISION} END"
+        ).execute_if(dialect="sqlite")
+        for name, event_name in (
+            ("insert", "INSERT"),
+            ("update", "UPDATE OF username, email, role"),
+            ("delete", "DELETE"),
+        )
+    ),
+    DDL(
+        "CREATE OR REPLACE FUNCTION bump_users_revision() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        f"BEGIN {_BUMP_USERS_REVISION} RETURN NULL; END $$"
+    ).execute_if(dialect="postgresql"),
+    DDL(
+        "CREATE OR REPLACE TRIGGER users_revision AFTER INSERT OR DELETE OR UPDATE OF username, email, role ON users "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_users_revision()"
+    ).execute_if(dialect="postgresql"),
+]
+for trigger in USERS_REVISION_TRIGGERS:
+    event.listen(UsersOrm.__table__, "after_create", trigger)
+
+class AuditLogOrm(Base):
+    """Журнал действий пользователей: только добавление, записи не изменяются и не удаляются вместе с пользователем."""
+    __tablename__ = 'audit_log'
+    metadata = metadata_obj
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime]
+    action: Mapped[str] = mapped_column(String(32))
+    actor_id: Mapped[Optional[int]]
+    actor_username: Mapped[Optional[str]]
+    target_username: Mapped[Optional[str]]
+    client_ip: Mapped[Optional[str]] = mapped_column(String(45))
+    details: Mapped[Optional[dict]] = mapped_column(JSON)
+
+    __table_args__ = (
+        Index("ix_audit_log_actor", "actor_username", "id"),
+        Index("ix_audit_log_target", "target_username", "id"),
+        Index("ix_audit_log_action", "action", "id"),
+    )
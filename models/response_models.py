@@ -1,5 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
+from datetime import datetime
+from enum import Enum
 
 from models.db_models import UserRole
 
@@ -15,6 +17,10 @@ class UserDataResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UsersPageResponse(BaseModel):
+    items: list[UserDataResponse] = Field(..., description="Пользователи на странице")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (null, если страница последняя)")
+
 class AuthorizationResponse(BaseModel):
     x_api_token: str = Field(..., description="API токен пользователя")
 
@@ -22,4 +28,96 @@ class UserUpdateResponse(BaseResponse):
     username: str = Field(..., description="Старое имя пользователя")
     new_username: str = Field(..., description="Новое имя пользователя")
     email: Optional[EmailStr] = Field(None, description="Новый Email (если указан)")
-    role: UserRole = Field(..., description="Новая роль пользователя", examples=["user", "admin", "superadmin"])
\ No newline at end of file
+    role: UserRole = Field(..., description="Новая роль пользователя", examples=["user", "admin", "superadmin"])
+
+class HashingStatsResponse(BaseModel):
+    workers: int = Field(..., description="Количество потоков в пуле хеширования")
+    queue_depth: int = Field(..., description="Максимальная глубина очереди ожидания")
+    in_flight: int = Field(..., description="Задач в работе и в очереди прямо сейчас")
+    completed: int = Field(..., description="Выполнено задач")
+    rejected: int = Field(..., description="Отклонено задач из-за переполнения (503)")
+    queue_wait_avg: float = Field(..., description="Среднее время ожидания в очереди, сек")
+    queue_wait_max: float = Field(..., description="Максимальное время ожидания в очереди, сек")
+    hash_time_avg: float = Field(..., description="Среднее время хеширования, сек")
+    hash_time_max: float = Field(..., description="Максимальное время хеширования, сек")
+    scheme: str = Field(..., description="Схема хеширования новых паролей", examples=["bcrypt", "argon2"])
+    rehashed: int = Field(..., description="Паролей перехешировано по текущей политике при входе")
+
+class TokenCacheStatsResponse(BaseModel):
+    size: int = Field(..., description="Текущее количество токенов в кэше")
+    max_size: int = Field(..., description="Максимальный размер кэша")
+    ttl: float = Field(..., description="Время жизни записи, сек")
+    hits: int = Field(..., description="Попадания в кэш")
+    misses: int = Field(..., description="Промахи кэша")
+    evictions: int = Field(..., description="Записи, вытесненные по LRU")
+    expirations: int = Field(..., description="Записи, удалённые по истечении TTL")
+    invalidations: int = Field(..., description="Записи, удалённые явной инвалидацией")
+
+class MembershipFilterStatsResponse(BaseModel):
+    enabled: bool = Field(..., description="Включены ли фильтры")
+    ready: bool = Field(..., description="Фильтры построены и используются")
+    usernames: int = Field(..., description="Сколько username добавлено в фильтр")
+    tokens: int = Field(..., description="Сколько токенов добавлено в фильтр")
+    checks: int = Field(..., description="Проверок по фильтрам")
+    definite_misses: int = Field(..., description="Проверок, отсечённых без запроса к БД")
+    false_positives: int = Field(..., description="Фильтр пропустил, но в БД записи не оказалось")
+    observed_false_positive_rate: float = Field(..., description="false_positives / (false_positives + definite_misses)")
+    estimated_username_false_positive_rate: float = Field(..., description="Расчётная доля ложных срабатываний фильтра username")
+    estimated_token_false_positive_rate: float = Field(..., description="Расчётная доля ложных срабатываний фильтра токенов")
+    rebuilds: int = Field(..., description="Сколько раз фильтры перестраивались")
+    syncs: int = Field(..., description="Сколько раз подтягивались добавления из других воркеров")
+
+class PageCacheStatsResponse(BaseModel):
+    size: int = Field(..., description="Текущее количество страниц в кэше")
+    max_size: int = Field(..., description="Максимальный размер кэша")
+    hits: int = Field(..., description="Попадания в кэш")
+    misses: int = Field(..., description="Промахи кэша")
+    stale: int = Field(..., description="Страницы, отброшенные после изменения таблицы")
+
+class AuditEventResponse(BaseModel):
+    id: int = Field(..., description="ID события")
+    created_at: datetime = Field(..., description="Время события (UTC)")
+    action: str = Field(..., description="Действие", examples=["user.create", "user.update", "user.delete", "auth.login", "auth.login_failed"])
+    actor_id: Optional[int] = Field(None, description="ID пользователя, выполнившего действие")
+    actor_username: Optional[str] = Field(None, description="Имя пользователя, выполнившего действие")
+    target_username: Optional[str] = Field(None, description="Имя пользователя, над которым выполнено действие")
+    client_ip: Optional[str] = Field(None, description="IP-адрес клиента")
+    details: Optional[dict] = Field(None, description="Подробности действия")
+
+    class Config:
+        from_attributes = True
+
+class AuditEventsPageResponse(BaseModel):
+    items: list[AuditEventResponse] = Field(..., description="События от новых к старым")
+    next_before_id: Optional[int] = Field(None, description="before_id следующей страницы (null, если страница последняя)")
+
+class AuditStatsResponse(BaseModel):
+    enabled: bool = Field(..., description="Включён ли журнал аудита")
+    queued: int = Field(..., description="Событий в очереди на запись")
+    queue_size: int = Field(..., description="Максимальный размер очереди")
+    recorded: int = Field(..., description="Событий принято в очередь")
+    written: int = Field(..., description="Событий записано в БД")
+    dropped: int = Field(..., description="Событий отброшено из-за переполненной очереди")
+    failed: int = Field(..., description="Событий, которые не удалось записать в БД")
+    batches: int = Field(..., description="Выполнено пакетных вставок")
+
+class BulkAddStatus(str, Enum):
+    created = "created"
+    duplicate = "duplicate"
+    invalid = "invalid"
+    forbidden = "forbidden"
+    retry = "retry"
+
+class BulkAddRowResult(BaseModel):
+    index: int = Field(..., description="Порядковый номер строки во входных данных (с 0)")
+    username: Optional[str] = Field(None, description="Имя пользователя (если удалось прочитать)")
+    status: BulkAddStatus = Field(..., description="Результат обработки строки", examples=["created", "duplicate", "invalid", "forbidden", "retry"])
+    detail: Optional[str] = Field(None, description="Причина, если пользователь не создан")
+
+class BulkAddResponse(BaseModel):
+    created: int = Field(..., description="Создано пользователей")
+    duplicates: int = Field(..., description="Пропущено: username уже занят")
+    invalid: int = Field(..., description="Пропущено: строка не прошла валидацию")
+    forbidden: int = Field(..., description="Пропущено: недостаточно прав для роли")
+    retry: int = Field(..., description="Не создано: сервис хеширования перегружен, строки можно отправить повторно")
+    results: list[BulkAddRowResult] = Field(..., description="Результат по каждой строке")
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+
+from modules.db.queryes import add_audit_events, utcnow
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() in ("1", "true", "yes")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", 0.5))
+AUDIT_WRITE_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """
+    Журнал аудита с асинхронной записью: события кладутся в ограниченную очередь,
+    а фоновая задача пишет их в таблицу audit_log пачками по batch_size или раз в flush_interval секунд.
+
+    Когда очередь заполнена, record() ждёт освобождения места до enqueue_timeout секунд,
+    притормаживая запрос, и только потом отбрасывает событие. stop() дописывает всё, что осталось в очереди.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = AUDIT_ENABLED,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL,
+        enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT,
+    ):
+        self.enabled = enabled
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        # очередь привязывается к event loop, поэтому создаётся при запуске приложения
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float | None = None):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)
+        try:
+            await asyncio.wait_for(task, timeout)
+        except TimeoutError:
+            logger.error("Журнал аудита не успел записать %d событий до остановки", self._queue.qsize())
+        self._queue = None
+
+    async def record(
+        self,
+        action: str,
+        actor_id: int | None = None,
+        actor_username: str | None = None,
+        target_username: str | None = None,
+        client_ip: str | None = None,
+        details: dict | None = None,
+    ):
+        if self._task is None:
+            return
+
+        event = {
+            "created_at": utcnow(),
+            "action": action,
+            "actor_id": actor_id,
+            "actor_username": actor_username,
+            "target_username": target_username,
+            "client_ip": client_ip,
+            "details": details,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(event), self.enqueue_timeout)
+            except TimeoutError:
+                self.dropped += 1
+                logger.warning("Очередь журнала аудита переполнена, событие %s отброшено", action)
+                return
+        self.recorded += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            event = await self._queue.get()
+            if event is None:
+                break
+
+            batch = [event]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._write(batch)
+
+    async def _write(self, batch: list[dict]):
+        for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+            try:
+                await add_audit_events(batch)
+            except Exception:
+                if attempt == AUDIT_WRITE_ATTEMPTS:
+                    self.failed += len(batch)
+                    logger.exception("Не удалось записать %d событий аудита", len(batch))
+                    return
+                await asyncio.sleep(attempt * 0.5)
+            else:
+                self.written += len(batch)
+                self.batches += 1
+                return
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+audit_log = AuditLog()
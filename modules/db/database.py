@@ -1,16 +1,106 @@
 import os
+import sqlite3
 
-from sqlalchemy import MetaData
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import MetaData, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite+aiosqlite:///database.db")
+# Реплика только для чтения; если не задана, чтение идёт в основную БД
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("SQLALCHEMY_READ_DATABASE_URL")
+# Для локальной проверки: при старте копировать основную SQLite-базу в файл реплики
+SQLITE_REPLICA_COPY_ON_START = os.getenv("SQLITE_REPLICA_COPY_ON_START", "false").lower() in ("1", "true", "yes")
+
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+# SQLite
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64 * 1024))  # < 0 — размер в КиБ
+
+# Пул соединений (Postgres и другие серверные БД)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+# Синхронные драйверы в URL заменяются на асинхронные
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
 
 metadata_obj = MetaData()
 
-engine = create_async_engine(
-    url=SQLALCHEMY_DATABASE_URL,
-    echo=True
-)
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_engine_from_env(url: str) -> AsyncEngine:
+    url = to_async_url(url)
+    kwargs = {"echo": DB_ECHO}
+    if make_url(url).get_backend_name() != "sqlite":
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    async_engine = create_async_engine(url=url, **kwargs)
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return async_engine
+
+
+def describe_engine(async_engine: AsyncEngine) -> str:
+    url = async_engine.url.render_as_string(hide_password=True)
+    if async_engine.dialect.name == "sqlite":
+        settings = (
+            f"journal_mode={SQLITE_JOURNAL_MODE} synchronous={SQLITE_SYNCHRONOUS} "
+            f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}ms mmap_size={SQLITE_MMAP_SIZE} cache_size={SQLITE_CACHE_SIZE}"
+        )
+    else:
+        settings = (
+            f"pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} "
+            f"pool_timeout={DB_POOL_TIMEOUT}s pool_recycle={DB_POOL_RECYCLE}s"
+        )
+    return f"{url} echo={DB_ECHO} pool={type(async_engine.pool).__name__} {settings}"
+
+
+def copy_sqlite_replica():
+    """Копирует основную SQLite-базу в файл реплики через backup API (согласованный снимок даже в режиме WAL)."""
+    if read_engine is engine or engine.dialect.name != "sqlite" or read_engine.dialect.name != "sqlite":
+        return
+
+    source = sqlite3.connect(engine.url.database)
+    target = sqlite3.connect(read_engine.url.database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+engine = create_engine_from_env(SQLALCHEMY_DATABASE_URL)
+read_engine = create_engine_from_env(SQLALCHEMY_READ_DATABASE_URL) if SQLALCHEMY_READ_DATABASE_URL else engine
 
 def create_tables():
-    metadata_obj.create_all(engine)
\ No newline at end of file
+    metadata_obj.create_all(engine)
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import os
+
+from modules.db.queryes import purge_expired_tokens, update_password_hash
+from modules.hashing_service import hashing_service, HashingServiceBusy
+
+TOKEN_PURGE_INTERVAL = float(os.getenv("TOKEN_PURGE_INTERVAL", 600))
+
+logger = logging.getLogger(__name__)
+
+# ссылки на фоновые задачи, чтобы их не удалил сборщик мусора до завершения
+_rehash_tasks: set[asyncio.Task] = set()
+
+
+async def purge_expired_tokens_periodically(interval: float = TOKEN_PURGE_INTERVAL):
+    while True:
+        try:
+            await purge_expired_tokens()
+        except Exception:
+            logger.exception("Не удалось удалить просроченные токены")
+        await asyncio.sleep(interval)
+
+
+async def rehash_password(user_id: int, password: str, old_hash: str):
+    try:
+        new_hash = await hashing_service.hash(password)
+        if await update_password_hash(user_id, old_hash, new_hash):
+            hashing_service.rehashed += 1
+    except HashingServiceBusy:
+        # пул занят входами и регистрацией — перехешируем при следующем входе
+        pass
+    except Exception:
+        logger.exception("Не удалось перехешировать пароль пользователя %s", user_id)
+
+
+def schedule_password_rehash(user_id: int, password: str, old_hash: str):
+    """Перехеширует пароль по текущей политике в фоне: ответ на вход не ждёт ни хеширования, ни записи."""
+    task = asyncio.create_task(rehash_password(user_id, password, old_hash))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from datetime import datetime, timezone
+
+from models.db_models import UsersOrm, UserTokensOrm
+from modules.db.database import engine
+from modules.shared_state import SharedCounters, shared_counters
+
+MEMBERSHIP_FILTER_ENABLED = os.getenv("MEMBERSHIP_FILTER_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMBERSHIP_FILTER_ERROR_RATE = float(os.getenv("MEMBERSHIP_FILTER_ERROR_RATE", 0.001))
+MEMBERSHIP_FILTER_MIN_CAPACITY = int(os.getenv("MEMBERSHIP_FILTER_MIN_CAPACITY", 100000))
+MEMBERSHIP_FILTER_REBUILD_INTERVAL = float(os.getenv("MEMBERSHIP_FILTER_REBUILD_INTERVAL", 3600))
+LOAD_BATCH_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+# Фильтры строятся по основной БД: реплика может отставать, а пропуск в фильтре означает «точно нет»
+session_factory = async_sessionmaker(engine)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = MEMBERSHIP_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class MembershipFilters:
+    """
+    Bloom-фильтры по username и по дайджестам токенов: промах в фильтре означает,
+    что такого пользователя или токена точно нет, и БД можно не запрашивать.
+
+    Удаления в фильтре не отражаются (только повышают долю ложных срабатываний),
+    поэтому фильтры периодически перестраиваются. Добавления из других воркеров
+    подтягиваются по id > последнего известного через общий счётчик membership_added,
+    а переименование или ручная перестройка через membership_reset заставляет
+    остальные воркеры перестроить фильтры целиком.
+    """
+
+    def __init__(self, enabled: bool = MEMBERSHIP_FILTER_ENABLED, counters: SharedCounters = shared_counters):
+        self.enabled = enabled
+        self.usernames: BloomFilter | None = None
+        self.tokens: BloomFilter | None = None
+        self._counters = counters
+        self._seen_added = counters.get("membership_added")
+        self._seen_reset = counters.get("membership_reset")
+        self._last_user_id = 0
+        self._last_token_id = 0
+        self._sync_lock = asyncio.Lock()
+        self._rebuild_task: asyncio.Task | None = None
+        self._rebuild_log: list[tuple[str, str]] | None = None
+
+        self.checks = 0
+        self.definite_misses = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self.syncs = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.usernames is not None
+
+    async def rebuild(self):
+        reset_generation = self._counters.get("membership_reset")
+        added_generation = self._counters.get("membership_added")
+        self._rebuild_log = []
+        try:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            async with session_factory() as session:
+                user_count = await session.scalar(select(func.count()).select_from(UsersOrm))
+                token_count = await session.scalar(
+                    select(func.count()).select_from(UserTokensOrm).where(UserTokensOrm.expires_at > now)
+                )
+                # запас по ёмкости, чтобы доля ложных срабатываний не росла до следующей перестройки
+                usernames = BloomFilter(max(MEMBERSHIP_FILTER_MIN_CAPACITY, 2 * user_count))
+                tokens = BloomFilter(max(MEMBERSHIP_FILTER_MIN_CAPACITY, 2 * token_count))
+
+                stmt = select(UsersOrm.id, UsersOrm.username).execution_options(yield_per=LOAD_BATCH_SIZE)
+                last_user_id = await self._load(session, stmt, usernames)
+                stmt = (
+                    select(UserTokensOrm.id, UserTokensOrm.token_digest)
+                    .where(UserTokensOrm.expires_at > now)
+                    .execution_options(yield_per=LOAD_BATCH_SIZE)
+                )
+                last_token_id = await self._load(session, stmt, tokens)
+
+            self.usernames, self.tokens = usernames, tokens
+            self._last_user_id, self._last_token_id = last_user_id, last_token_id
+            # добавления, сделанные этим процессом во время перестройки
+            for kind, value in self._rebuild_log:
+                (self.usernames if kind == "username" else self.tokens).add(value)
+        finally:
+            self._rebuild_log = None
+
+        self._seen_reset = reset_generation
+        self._seen_added = added_generation
+        self.rebuilds += 1
+
+    @staticmethod
+    async def _load(session, stmt, bloom: BloomFilter) -> int:
+        last_id = 0
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            for row_id, value in rows:
+                bloom.add(value)
+                last_id = max(last_id, row_id)
+        return last_id
+
+    def _schedule_rebuild(self):
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self.rebuild())
+
+    async def _sync(self) -> bool:
+        """Подтягивает изменения других воркеров. False — фильтры устарели и ответ «точно нет» давать нельзя."""
+        if self._counters.get("membership_reset") != self._seen_reset:
+            self._schedule_rebuild()
+            return False
+
+        if self._counters.get("membership_added") == self._seen_added:
+            return True
+
+        async with self._sync_lock:
+            added_generation = self._counters.get("membership_added")
+            if added_generation == self._seen_added:
+                return True
+
+            async with session_factory() as session:
+                users = (await session.execute(
+                    select(UsersOrm.id, UsersOrm.username).where(UsersOrm.id > self._last_user_id)
+                )).all()
+                tokens = (await session.execute(
+                    select(UserTokensOrm.id, UserTokensOrm.token_digest).where(UserTokensOrm.id > self._last_token_id)
+                )).all()
+
+            for user_id, username in users:
+                self.usernames.add(username)
+                self._last_user_id = max(self._last_user_id, user_id)
+            for token_id, token_digest in tokens:
+                self.tokens.add(token_digest)
+                self._last_token_id = max(self._last_token_id, token_id)
+
+            self._seen_added = added_generation
+            self.syncs += 1
+        return True
+
+    async def _might_contain(self, kind: str, value: str) -> bool:
+        if not self.ready:
+            return True
+
+        self.checks += 1
+        bloom = self.usernames if kind == "username" else self.tokens
+        if value in bloom:
+            return True
+        if not await self._sync():
+            return True
+
+        bloom = self.usernames if kind == "username" else self.tokens
+        if value in bloom:
+            return True
+        self.definite_misses += 1
+        return False
+
+    async def might_contain_username(self, username: str) -> bool:
+        return await self._might_contain("username", username)
+
+    async def might_contain_token(self, token_digest: str) -> bool:
+        return await self._might_contain("token", token_digest)
+
+    def record_false_positive(self):
+        if self.ready:
+            self.false_positives += 1
+
+    def _add(self, kind: str, values: list[str], slot: str):
+        if not self.enabled:
+            return
+        if self.ready:
+            bloom = self.usernames if kind == "username" else self.tokens
+            for value in values:
+                bloom.add(value)
+        if self._rebuild_log is not None:
+            self._rebuild_log.extend((kind, value) for value in values)
+
+        generation = self._counters.bump(slot)
+        seen_attr = "_seen_reset" if slot == "membership_reset" else "_seen_added"
+        if generation == getattr(self, seen_attr) + 1:
+            # других изменений с прошлой синхронизации не было — свои уже в фильтре
+            setattr(self, seen_attr, generation)
+
+    def add_usernames(self, usernames: list[str], renamed: bool = False):
+        # переименование не ловится выборкой по id, поэтому остальные воркеры перестраивают фильтр целиком
+        self._add("username", usernames, "membership_reset" if renamed else "membership_added")
+
+    def add_token(self, token_digest: str):
+        self._add("token", [token_digest], "membership_added")
+
+    async def rebuild_everywhere(self):
+        """Перестраивает фильтры в этом процессе и просит остальные воркеры сделать то же."""
+        self._counters.bump("membership_reset")
+        await self.rebuild()
+
+    async def rebuild_periodically(self, interval: float = MEMBERSHIP_FILTER_REBUILD_INTERVAL, rebuild_first: bool = False):
+        """С rebuild_first=True первое построение идёт сразу: до него фильтры отвечают «возможно есть» и запросы идут в БД."""
+        if not rebuild_first:
+            await asyncio.sleep(interval)
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Не удалось перестроить фильтры пользователей и токенов")
+            else:
+                logger.info("Membership filters: %s", self.stats())
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        negatives = self.definite_misses + self.false_positives
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "usernames": self.usernames.count if self.usernames else 0,
+            "tokens": self.tokens.count if self.tokens else 0,
+            "checks": self.checks,
+            "definite_misses": self.definite_misses,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": self.false_positives / negatives if negatives else 0.0,
+            "estimated_username_false_positive_rate": self.usernames.estimated_false_positive_rate() if self.usernames else 0.0,
+            "estimated_token_false_positive_rate": self.tokens.estimated_false_positive_rate() if self.tokens else 0.0,
+            "rebuilds": self.rebuilds,
+            "syncs": self.syncs,
+        }
+
+
+membership_filters = MembershipFilters()
@@ -0,0 +1,91 @@
+import logging
+
+from sqlalchemy import Connection, Table, inspect, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateTable
+
+from models.db_models import USERS_REVISION_TRIGGERS, TableRevisionsOrm, UsersOrm, UserTokensOrm
+
+logger = logging.getLogger(__name__)
+
+# id в этих таблицах не должны выдаваться повторно после удаления (см. UsersOrm)
+AUTOINCREMENT_TABLES = (UsersOrm.__table__, UserTokensOrm.__table__)
+
+
+def _table_columns(connection: Connection, name: str) -> list[str]:
+    return [row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({name})")]
+
+
+def _has_autoincrement(connection: Connection, name: str) -> bool:
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+
+def _rebuild_sqlite_table(connection: Connection, table: Table):
+    """Пересоздаёт таблицу по текущей модели с переносом данных: AUTOINCREMENT в SQLite не включить через ALTER TABLE."""
+    rebuilt = f"{table.name}_rebuild"
+    columns = ", ".join(column for column in _table_columns(connection, table.name) if column in table.c)
+    create_sql = str(CreateTable(table).compile(dialect=connection.dialect)).replace(
+        f"CREATE TABLE {table.name} (", f"CREATE TABLE {rebuilt} (", 1
+    )
+
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {rebuilt}")
+    connection.exec_driver_sql(create_sql)
+    connection.exec_driver_sql(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}")
+    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+    connection.exec_driver_sql(f"ALTER TABLE {rebuilt} RENAME TO {table.name}")
+    # индексы удаляются вместе со старой таблицей
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _upgrade_sqlite(connection: Connection):
+    stale = [table for table in AUTOINCREMENT_TABLES if not _has_autoincrement(connection, table.name)]
+    if not stale:
+        return
+
+    # внешние ключи отключаются вне транзакции, иначе DROP TABLE users каскадно удалит все токены
+    connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    try:
+        for table in stale:
+            logger.info("Пересоздание таблицы %s с AUTOINCREMENT", table.name)
+            _rebuild_sqlite_table(connection, table)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+
+
+def _upgrade(connection: Connection):
+    users_columns = {column["name"] for column in inspect(connection).get_columns(UsersOrm.__tablename__)}
+    if "version" not in users_columns:
+        logger.info("Добавление столбца users.version")
+        connection.exec_driver_sql("ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    for index in UsersOrm.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+    revision = connection.execute(select(TableRevisionsOrm.name).where(TableRevisionsOrm.name == "users")).first()
+    if revision is None:
+        connection.execute(insert(TableRevisionsOrm).values(name="users", revision=0))
+
+    # триггеры удаляются вместе с пересоздаваемой таблицей, поэтому создаются последними
+    for trigger in USERS_REVISION_TRIGGERS:
+        trigger(UsersOrm.__table__, connection)
+
+
+async def upgrade_schema(async_engine: AsyncEngine):
+    """
+    Доводит таблицы, созданные прежними версиями приложения, до текущих моделей:
+    create_all создаёт только недостающие таблицы. Каждый шаг сначала проверяет,
+    нужен ли он, поэтому повторный запуск ничего не меняет.
+    """
+    if async_engine.dialect.name == "sqlite":
+        async with async_engine.connect() as conn:
+            await conn.run_sync(_upgrade_sqlite)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(_upgrade)
@@ -1,122 +1,540 @@
-from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+import base64
+import binascii
+import json
+import os
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from sqlalchemy import Row, Select, bindparam, select, insert, update, delete, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.exc import IntegrityError
 
-from models.db_models import UsersOrm
-from modules.db.database import engine
-from modules.secrets_manager import hash_password
+from models.db_models import UsersOrm, UserTokensOrm, UserRole, TableRevisionsOrm, AuditLogOrm
+from modules.db.database import engine, read_engine
+from modules.db.membership import membership_filters
+from modules.hashing_service import HashingServiceBusy, hashing_service
+from modules.secrets_manager import hash_token
+from modules.token_cache import token_cache
+
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", 7 * 24 * 3600))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", 500))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", 500))
+AUDIT_PAGE_MAX_SIZE = 100
+
+USER_LIST_COLUMNS = [col for col in UsersOrm.__table__.columns if col.name not in ('password', 'version')]
 
+# Запись и чтение собственных изменений — в основную БД, остальное чтение — в реплику
 session_factory = async_sessionmaker(engine)
+read_session_factory = async_sessionmaker(read_engine)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Unit of work для FastAPI: одна сессия основной БД на весь запрос, передаётся в функции ниже через session=."""
+    async with session_factory() as session:
+        yield session
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession | None = None, factory: async_sessionmaker = session_factory):
+    if session is not None:
+        yield session
+    else:
+        async with factory() as new_session:
+            yield new_session
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Запросы собираются один раз на каждую комбинацию фильтра и сортировки, а значения передаются
+# связанными параметрами: готовый объект запроса запоминает свой ключ кеша, и SQLAlchemy берёт
+# скомпилированный SQL из кеша движка, не собирая и не хешируя выражение заново на каждый вызов.
+ORDER_COLUMNS = {"id": UsersOrm.id, "username": UsersOrm.username, "role": UsersOrm.role}
 
 
+def _ordered(stmt: Select, cols: list, order_desc: bool) -> Select:
+    return stmt.order_by(*(col.desc() if order_desc else col for col in cols))
+
+def _users_select(with_role: bool) -> Select:
+    stmt = select(*USER_LIST_COLUMNS)
+    if with_role:
+        stmt = stmt.where(UsersOrm.role == bindparam("role"))
+    return stmt
+
+@cache
+def _users_list_stmt(with_role: bool, order_by: str, order_desc: bool) -> Select:
+    stmt = _ordered(_users_select(with_role), [ORDER_COLUMNS[order_by]], order_desc)
+    return stmt.offset(bindparam("offset")).limit(bindparam("limit"))
+
 async def get_all_users(
     limit: int = 100,
     offset: int = 0,
     role: str = None,
     order_by: str = "id",
     order_desc: bool = False,
-) -> list[dict]:
-    async with session_factory() as session:
-        columns = [col for col in UsersOrm.__table__.columns if col.name != 'password']
-        stmt = select(*columns)
+) -> list[Row]:
+    if order_by not in ORDER_COLUMNS:
+        order_by = "id"
+    stmt = _users_list_stmt(role is not None, order_by, bool(order_desc))
+    params = {"offset": max(0, offset), "limit": max(0, min(limit, 100))}
+    if role is not None:
+        params["role"] = role
 
-        if role is not None:
-            stmt = stmt.where(UsersOrm.role == role)
+    async with read_session_factory() as session:
+        return (await session.execute(stmt, params)).all()
 
-        limit = min(limit, 100)
+def _encode_cursor(order_by: str, order_desc: bool, last_row: Row) -> str:
+    last_value = getattr(last_row, order_by)
+    if isinstance(last_value, UserRole):
+        last_value = last_value.value
+    payload = json.dumps([order_by, order_desc, last_value, last_row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
 
-        order_col = UsersOrm.id
-        if order_by == "username":
-            order_col = UsersOrm.username
-        elif order_by == "role":
-            order_col = UsersOrm.role
+# тип значения сортируемого столбца в курсоре
+CURSOR_VALUE_TYPES = {"id": int, "username": str, "role": str}
+# диапазон INTEGER в SQLite (и BIGINT в Postgres): больше драйвер не передаст в запрос
+DB_INT_MIN, DB_INT_MAX = -2**63, 2**63 - 1
 
-        stmt = stmt.order_by(order_col.desc() if order_desc else order_col)
-        stmt = stmt.offset(offset).limit(limit)
+def _is_db_int(value) -> bool:
+    return type(value) is int and DB_INT_MIN <= value <= DB_INT_MAX
 
-        result = await session.execute(stmt)
-        return [row._asdict() for row in result.fetchall()]
-    
-async def get_user_data(username: str = None, token: str = None) -> UsersOrm | None:
-    async with session_factory() as session:
-        if username:
-            stmt = select(UsersOrm).where(UsersOrm.username == username)
-        elif token:
-            stmt = select(UsersOrm).where(UsersOrm.token == token)
-        else:
-            raise AttributeError("Необходимо указать username или token для поиска пользователя!")
-
-        user = (await session.execute(stmt)).scalar_one_or_none()
-
-        return user
-    
-async def add_new_user(username: str, password: str, role: str, email: str = None) -> bool:
-    async with session_factory() as session:
+def _decode_cursor(cursor: str, order_by: str, order_desc: bool) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order_by, cursor_order_desc, last_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Курсор повреждён!")
+
+    if cursor_order_by != order_by or cursor_order_desc != order_desc:
+        raise ValueError("Курсор получен для другой сортировки!")
+    # значения уходят в запрос как параметры, поэтому проверяется точный тип (bool — тоже int) и диапазон
+    if type(last_value) is not CURSOR_VALUE_TYPES[order_by] or not _is_db_int(last_id):
+        raise ValueError("Курсор повреждён!")
+    if order_by == "id" and not _is_db_int(last_value):
+        raise ValueError("Курсор повреждён!")
+
+    if order_by == "role":
+        try:
+            last_value = UserRole(last_value)
+        except ValueError:
+            raise ValueError("Курсор повреждён!")
+    return last_value, last_id
+
+@cache
+def _users_page_stmt(with_role: bool, order_by: str, order_desc: bool, after_cursor: bool) -> Select:
+    # id и username уникальны, для role нужен id как второй ключ сортировки
+    if order_by == "role":
+        order_cols = [UsersOrm.role, UsersOrm.id]
+    else:
+        order_cols = [ORDER_COLUMNS[order_by]]
+
+    def ordered(stmt, cols):
+        return _ordered(stmt, cols, order_desc).limit(bindparam("limit"))
+
+    stmt = _users_select(with_role)
+    if not after_cursor:
+        return ordered(stmt, order_cols)
+
+    def after(col, value):
+        return col < value if order_desc else col > value
+
+    last_value, last_id = bindparam("last_value"), bindparam("last_id")
+    if order_by == "role":
+        # SQLite ищет по (role, id) > (?, ?) только по первой колонке индекса и сканирует
+        # всю группу роли, поэтому хвост текущей роли и следующие роли выбираются отдельно
+        same_role = ordered(stmt.where(UsersOrm.role == last_value, after(UsersOrm.id, last_id)), order_cols)
+        next_roles = ordered(stmt.where(after(UsersOrm.role, last_value)), order_cols)
+        page = union_all(same_role.subquery().select(), next_roles.subquery().select()).subquery()
+        return ordered(select(*page.c), [page.c.role, page.c.id])
+    return ordered(stmt.where(after(order_cols[0], last_value)), order_cols)
+
+async def get_users_page(
+    limit: int = 100,
+    cursor: str | None = None,
+    role: str = None,
+    order_by: str = "id",
+    order_desc: bool = False,
+) -> tuple[list[Row], str | None]:
+    """
+    Keyset-пагинация: вместо OFFSET продолжает выборку с последнего ключа сортировки (+ id),
+    поэтому стоимость страницы не зависит от её глубины.
+    Возвращает строки страницы и курсор следующей страницы (None, если страница последняя).
+    """
+    if order_by not in ORDER_COLUMNS:
+        order_by = "id"
+    order_desc = bool(order_desc)
+    limit = max(1, min(limit, 100))
+
+    params = {"limit": limit + 1}
+    if role is not None:
+        params["role"] = role
+    if cursor is not None:
+        params["last_value"], params["last_id"] = _decode_cursor(cursor, order_by, order_desc)
+    stmt = _users_page_stmt(role is not None, order_by, order_desc, cursor is not None)
+
+    async with read_session_factory() as session:
+        rows = (await session.execute(stmt, params)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(order_by, order_desc, rows[-1])
+    return rows, next_cursor
+
+@cache
+def _users_export_stmt(with_role: bool, with_since_id: bool) -> Select:
+    stmt = _users_select(with_role).order_by(UsersOrm.id)
+    if with_since_id:
+        stmt = stmt.where(UsersOrm.id > bindparam("since_id"))
+    return stmt
+
+async def stream_users(
+    role: str = None,
+    since_id: int | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[list[Row]]:
+    """Потоково отдаёт всех пользователей (без пароля) пачками по batch_size в порядке id, не загружая таблицу в память."""
+    stmt = _users_export_stmt(role is not None, since_id is not None)
+    params = {}
+    if role is not None:
+        params["role"] = role
+    if since_id is not None:
+        params["since_id"] = since_id
+
+    async with read_session_factory() as session:
+        result = await session.stream(stmt, params, execution_options={"yield_per": batch_size})
+        async for rows in result.partitions():
+            yield rows
+
+USER_BY_USERNAME_STMT = select(*USER_LIST_COLUMNS, UsersOrm.version).where(UsersOrm.username == bindparam("username"))
+USER_VERSION_BY_USERNAME_STMT = select(UsersOrm.id, UsersOrm.version).where(UsersOrm.username == bindparam("username"))
+USER_WITH_PASSWORD_BY_USERNAME_STMT = USER_BY_USERNAME_STMT.add_columns(UsersOrm.password)
+USER_BY_TOKEN_STMT = (
+    select(*USER_LIST_COLUMNS)
+    .join(UserTokensOrm, UserTokensOrm.user_id == UsersOrm.id)
+    .where(UserTokensOrm.token_digest == bindparam("token_digest"), UserTokensOrm.expires_at > bindparam("now"))
+)
+
+async def get_user_data(
+    username: str = None,
+    token: str = None,
+    use_primary: bool = False,
+    session: AsyncSession | None = None,
+    with_password: bool = False,
+) -> Row | None:
+    """
+    Ищет пользователя по username или токену и возвращает строку (id, username, email, role)
+    без загрузки ORM-объекта. При поиске по username в строку добавляется version,
+    а with_password добавляет хеш пароля.
+    """
+    if username:
+        if not await membership_filters.might_contain_username(username):
+            return None
+        stmt = USER_WITH_PASSWORD_BY_USERNAME_STMT if with_password else USER_BY_USERNAME_STMT
+        params = {"username": username}
+    elif token:
+        token_digest = hash_token(token)
+        if not await membership_filters.might_contain_token(token_digest):
+            return None
+        stmt = USER_BY_TOKEN_STMT
+        params = {"token_digest": token_digest, "now": utcnow()}
+    else:
+        raise AttributeError("Необходимо указать username или token для поиска пользователя!")
+
+    factory = session_factory if use_primary else read_session_factory
+    async with session_scope(session, factory) as session:
+        user = (await session.execute(stmt, params)).one_or_none()
+
+    if user is None:
+        membership_filters.record_false_positive()
+    return user
+
+async def get_user_version(username: str) -> Row | None:
+    """(id, version) пользователя для проверки ETag без выборки всей строки."""
+    if not await membership_filters.might_contain_username(username):
+        return None
+    async with read_session_factory() as session:
+        return (await session.execute(USER_VERSION_BY_USERNAME_STMT, {"username": username})).one_or_none()
+
+USERS_REVISION_STMT = select(TableRevisionsOrm.revision).where(TableRevisionsOrm.name == "users")
+
+async def get_users_revision() -> int:
+    """
+    Счётчик изменений таблицы users; читается из той же БД, что и списки пользователей.
+    Увеличивается триггерами на users (см. models/db_models.py), а не отдельным запросом.
+    """
+    async with read_session_factory() as session:
+        return (await session.execute(USERS_REVISION_STMT)).scalar_one()
+
+async def add_new_user(username: str, password: str, role: str, email: str = None, session: AsyncSession | None = None) -> bool:
+    hashed_password = await hashing_service.hash(password)
+
+    async with session_scope(session) as session:
         session.add(
             UsersOrm(
                 username=username,
                 email=email,
                 role=role,
-                password=hash_password(password)
+                password=hashed_password
             )
         )
         await session.commit()
 
-        return True
-    
-async def update_user_token(token: str, username: str) -> bool:
+    membership_filters.add_usernames([username])
+    return True
+
+async def add_new_users_bulk(users: list[dict], chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> dict[str, bool | None]:
+    """
+    Создаёт пользователей пачками по chunk_size: одна транзакция и один многострочный INSERT на пачку.
+    users — словари с ключами username, password, email, role; username должны быть уникальны внутри списка.
+    Возвращает username -> True (создан) / False (уже существует) / None (не создан: сервис хеширования
+    перегружен, строку можно повторить). Пароли уже занятых username не хешируются.
+    """
+    created = {}
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start:start + chunk_size]
+
+        async with session_factory() as session:
+            stmt = select(UsersOrm.username).where(UsersOrm.username.in_([user["username"] for user in chunk]))
+            existing = set((await session.scalars(stmt)).all())
+
+        new_users = [user for user in chunk if user["username"] not in existing]
+        created.update((username, False) for username in existing)
+        try:
+            hashed_passwords = await hashing_service.hash_many([user["password"] for user in new_users])
+        except HashingServiceBusy:
+            # уже созданные пачки остаются, эта пачка не создаётся; следующие пробуем дальше
+            created.update((user["username"], None) for user in new_users)
+            continue
+        rows = [{**user, "password": hashed} for user, hashed in zip(new_users, hashed_passwords)]
+
+        if not rows:
+            continue
+
+        async with session_factory() as session:
+            try:
+                await session.execute(insert(UsersOrm).values(rows))
+                await session.commit()
+                created.update((row["username"], True) for row in rows)
+                membership_filters.add_usernames([row["username"] for row in rows])
+                continue
+            except IntegrityError:
+                await session.rollback()
+
+            # кто-то занял username между проверкой и вставкой — вставляем пачку построчно
+            for row in rows:
+                try:
+                    async with session.begin_nested():
+                        await session.execute(insert(UsersOrm).values(row))
+                    created[row["username"]] = True
+                except IntegrityError:
+                    created[row["username"]] = False
+            await session.commit()
+            membership_filters.add_usernames([row["username"] for row in rows if created[row["username"]]])
+
+    return created
+
+TOKEN_OWNER_STMT = (
+    select(UsersOrm.id, UsersOrm.username, UsersOrm.role, UserTokensOrm.expires_at)
+    .join(UserTokensOrm, UserTokensOrm.user_id == UsersOrm.id)
+    .where(UserTokensOrm.token_digest == bindparam("token_digest"), UserTokensOrm.expires_at > bindparam("now"))
+)
+
+async def get_token_owner(token: str) -> Row | None:
+    """
+    Точечный поиск по уникальному индексу token_digest: (id, username, role, expires_at) владельца токена.
+    Ищет в реплике; только что выданный токен может туда ещё не попасть, поэтому промах перепроверяется в основной БД.
+    Токены, которых точно нет в фильтре membership_filters, отклоняются без запроса к БД.
+    """
+    token_digest = hash_token(token)
+    if not await membership_filters.might_contain_token(token_digest):
+        return None
+
+    params = {"token_digest": token_digest, "now": utcnow()}
+    async with read_session_factory() as session:
+        owner = (await session.execute(TOKEN_OWNER_STMT, params)).one_or_none()
+
+    if owner is None and read_engine is not engine:
+        async with session_factory() as session:
+            owner = (await session.execute(TOKEN_OWNER_STMT, params)).one_or_none()
+
+    if owner is None:
+        membership_filters.record_false_positive()
+    return owner
+
+UPDATE_PASSWORD_HASH_STMT = (
+    update(UsersOrm)
+    .where(UsersOrm.id == bindparam("user_id"), UsersOrm.password == bindparam("old_password"))
+    .values(password=bindparam("new_password"))
+    .execution_options(synchronize_session=False)
+)
+
+async def update_password_hash(user_id: int, old_password: str, new_password: str) -> bool:
+    """
+    Заменяет хеш пароля, только если он не менялся с момента проверки (смена пароля через edit_user не перезаписывается).
+    Пароль и данные пользователя не меняются, поэтому version и ревизия таблицы не увеличиваются.
+    """
+    params = {"user_id": user_id, "old_password": old_password, "new_password": new_password}
     async with session_factory() as session:
-        stmt = update(UsersOrm).filter(UsersOrm.username == username).values(
-            token=token
+        result = await session.execute(UPDATE_PASSWORD_HASH_STMT, params)
+        await session.commit()
+    return result.rowcount == 1
+
+async def add_user_token(token: str, user_id: int, session: AsyncSession | None = None) -> bool:
+    created_at = utcnow()
+    token_digest = hash_token(token)
+    async with session_scope(session) as session:
+        session.add(
+            UserTokensOrm(
+                token_digest=token_digest,
+                user_id=user_id,
+                created_at=created_at,
+                expires_at=created_at + timedelta(seconds=TOKEN_TTL_SECONDS)
+            )
         )
-        await session.execute(stmt)
         await session.commit()
 
+    membership_filters.add_token(token_digest)
     return True
 
-async def delete_user_data(username: str) -> bool:
-    async with session_factory() as session:
-        stmt = select(UsersOrm).where(UsersOrm.username == username)
-        user = (await session.execute(stmt)).scalar_one_or_none()
-        if user:
-            await session.delete(user)
+async def purge_expired_tokens(batch_size: int = TOKEN_PURGE_BATCH_SIZE) -> int:
+    """Удаляет просроченные токены пачками по batch_size, коммитя каждую пачку отдельно, чтобы не держать долгую блокировку записи."""
+    deleted = 0
+    while True:
+        async with session_factory() as session:
+            expired_ids = (
+                select(UserTokensOrm.id)
+                .where(UserTokensOrm.expires_at <= utcnow())
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await session.execute(delete(UserTokensOrm).where(UserTokensOrm.id.in_(expired_ids)))
             await session.commit()
-            return True
-        else:
-            return False
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+        await asyncio.sleep(0)
+
+# Пустой список в NOT IN раскрывается SQLAlchemy в условие, которое выполняется для любой строки
+DELETE_USER_STMT = (
+    delete(UsersOrm)
+    .where(UsersOrm.username == bindparam("username"), UsersOrm.role.not_in(bindparam("protected_roles", expanding=True)))
+    .returning(UsersOrm.id)
+)
+
+async def delete_user_data(username: str, protected_roles: tuple[str, ...] = (), session: AsyncSession | None = None) -> bool:
+    """
+    Удаляет пользователя одной командой DELETE ... RETURNING (токены удаляются каскадно).
+    Пользователи с ролью из protected_roles не удаляются. Возвращает False, если подходящего пользователя нет.
+    """
+    params = {"username": username, "protected_roles": list(protected_roles)}
+    async with session_scope(session) as session:
+        deleted_id = (await session.execute(DELETE_USER_STMT, params)).scalar_one_or_none()
+        await session.commit()
+
+    if deleted_id is None:
+        return False
+
+    token_cache.invalidate_user(username)
+    return True
 
 async def update_user_data(
     username: str,
     new_username: str | None = None,
     email: str | None = None,
     role: str | None = None,
-    password: str | None = None
-) -> bool:
-    async with session_factory() as session:
-        stmt = select(UsersOrm).where(UsersOrm.username == username)
-        user = (await session.execute(stmt)).scalar_one_or_none()
-        
-        if not user:
-            return False
-
-        update_data = {}
-        if new_username is not None:
-            update_data["username"] = new_username
-        if email is not None:
-            update_data["email"] = email
-        if role is not None:
-            update_data["role"] = role
-        if password is not None:
-            update_data["password"] = hash_password(password)
+    password: str | None = None,
+    protected_roles: tuple[str, ...] = (),
+    session: AsyncSession | None = None,
+) -> Row | None:
+    """
+    Изменяет пользователя одной командой UPDATE ... RETURNING и увеличивает его version.
+    Пользователи с ролью из protected_roles не изменяются.
+    Возвращает (id, username, email, role) после изменения или None, если подходящего пользователя нет.
+    При занятом new_username пробрасывает IntegrityError.
+    """
+    hashed_password = await hashing_service.hash(password) if password is not None else None
 
+    update_data = {}
+    if new_username is not None:
+        update_data["username"] = new_username
+    if email is not None:
+        update_data["email"] = email
+    if role is not None:
+        update_data["role"] = role
+    if hashed_password is not None:
+        update_data["password"] = hashed_password
+
+    conditions = [UsersOrm.username == username]
+    if protected_roles:
+        conditions.append(UsersOrm.role.not_in(protected_roles))
+
+    async with session_scope(session) as session:
         if not update_data:
-            return True
+            return (await session.execute(select(*USER_LIST_COLUMNS).where(*conditions))).one_or_none()
 
+        stmt = (
+            update(UsersOrm)
+            .where(*conditions)
+            .values(**update_data, version=UsersOrm.version + 1)
+            .returning(*USER_LIST_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
         try:
-            for key, value in update_data.items():
-                setattr(user, key, value)
+            user = (await session.execute(stmt)).one_or_none()
             await session.commit()
-            return True
         except IntegrityError:
             await session.rollback()
-            return False
\ No newline at end of file
+            raise
+
+    if user is not None:
+        token_cache.invalidate_user(username)
+        if user.username != username:
+            membership_filters.add_usernames([user.username], renamed=True)
+    return user
+
+async def add_audit_events(events: list[dict]):
+    """Записывает пачку событий аудита одним многострочным INSERT."""
+    async with session_factory() as session:
+        await session.execute(insert(AuditLogOrm).values(events))
+        await session.commit()
+
+@cache
+def _audit_page_stmt(with_before_id: bool, with_action: bool, with_actor: bool, with_target: bool) -> Select:
+    stmt = select(AuditLogOrm).order_by(AuditLogOrm.id.desc()).limit(bindparam("limit"))
+    if with_before_id:
+        stmt = stmt.where(AuditLogOrm.id < bindparam("before_id"))
+    if with_action:
+        stmt = stmt.where(AuditLogOrm.action == bindparam("action"))
+    if with_actor:
+        stmt = stmt.where(AuditLogOrm.actor_username == bindparam("actor"))
+    if with_target:
+        stmt = stmt.where(AuditLogOrm.target_username == bindparam("target"))
+    return stmt
+
+async def get_audit_events(
+    limit: int = AUDIT_PAGE_MAX_SIZE,
+    before_id: int | None = None,
+    action: str | None = None,
+    actor: str | None = None,
+    target: str | None = None,
+) -> tuple[list[AuditLogOrm], int | None]:
+    """
+    Страница журнала аудита от новых событий к старым (keyset по id).
+    Возвращает события и before_id следующей страницы (None, если страница последняя).
+    """
+    limit = max(1, min(limit, AUDIT_PAGE_MAX_SIZE))
+    params = {"limit": limit + 1, "before_id": before_id, "action": action, "actor": actor, "target": target}
+    stmt = _audit_page_stmt(before_id is not None, action is not None, actor is not None, target is not None)
+
+    async with read_session_factory() as session:
+        events = list((await session.scalars(stmt, {key: value for key, value in params.items() if value is not None})).all())
+
+    if len(events) > limit:
+        return events[:limit], events[limit - 1].id
+    return events, None
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.metrics import record_hash_time
+from modules.secrets_manager import hash_password, verify_password, password_needs_update, PASSWORD_HASH_SCHEMES
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", 64))
+
+
+class HashingServiceBusy(Exception):
+    """Пул хеширования заполнен — запрос отклоняется, а не ставится в бесконечную очередь."""
+
+
+class PasswordHashingService:
+    """
+    Выполняет хеширование паролей (bcrypt или argon2) в отдельном пуле потоков, чтобы не блокировать event loop.
+
+    Обе схемы отпускают GIL, поэтому потоков достаточно. Одновременно допускается
+    не больше workers + queue_depth задач, остальные получают HashingServiceBusy.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_depth: int = HASH_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+        self.rehashed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._in_flight >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise HashingServiceBusy()
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started, time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._get_executor(), job)
+        finally:
+            self._in_flight -= 1
+
+        queue_wait = started - submitted
+        hash_time = finished - started
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += hash_time
+        self.hash_time_max = max(self.hash_time_max, hash_time)
+        record_hash_time(finished - submitted)
+
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Хеширует пароли параллельно, не занимая больше workers мест в очереди одновременно."""
+        hashed = []
+        for start in range(0, len(passwords), self.workers):
+            chunk = passwords[start:start + self.workers]
+            hashed += await asyncio.gather(*(self.hash(password) for password in chunk))
+        return hashed
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """Хеш другой схемы или стоимости — разбор строки хеша, без самого хеширования, поэтому не в пуле."""
+        return password_needs_update(hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / self.completed if self.completed else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+            "hash_time_avg": self.hash_time_total / self.completed if self.completed else 0.0,
+            "hash_time_max": self.hash_time_max,
+            "scheme": PASSWORD_HASH_SCHEMES[0],
+            "rehashed": self.rehashed,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_service = PasswordHashingService()
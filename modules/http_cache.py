@@ -0,0 +1,68 @@
+import os
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", 256))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверка If-None-Match: слабое сравнение по RFC 9110, "*" совпадает с любым существующим ресурсом."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+class RenderedPageCache:
+    """
+    LRU кэш готовых JSON-ответов со списками пользователей: ключ запроса -> (ревизия таблицы, тело ответа).
+
+    Ревизия хранится в БД и увеличивается при любой записи в таблицу, поэтому запись с устаревшей
+    ревизией просто не используется, а воркеры не нуждаются в отдельной инвалидации.
+    """
+
+    def __init__(self, max_size: int = PAGE_CACHE_SIZE):
+        self.max_size = max_size
+        self._pages: OrderedDict[tuple, tuple[int, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, key: tuple, revision: int) -> bytes | None:
+        entry = self._pages.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != revision:
+            self.stale += 1
+            del self._pages[key]
+            return None
+        self._pages.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: tuple, revision: int, body: bytes):
+        if self.max_size <= 0:
+            return
+        self._pages[key] = (revision, body)
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._pages),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+        }
+
+
+users_page_cache = RenderedPageCache()
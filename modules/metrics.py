@@ -0,0 +1,169 @@
+import os
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# /metrics отдаётся без x-api-token: если токен задан, он требуется в заголовке Authorization: Bearer <токен>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_time", "hash_time")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.hash_time = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def record_hash_time(seconds: float):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.hash_time += seconds
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: tuple, label_names: tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # счётчики по корзинам, затем sum и count
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            label_str = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{label_str},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_str},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{label_str}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{label_str}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values: dict[tuple, int] = {}
+
+    def inc(self, labels: tuple, amount: int = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            label_str = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{label_str}}} {value}")
+        return lines
+
+
+requests_total = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+request_duration = Histogram("http_request_duration_seconds", "Handler time", TIME_BUCKETS, ("method", "route"))
+request_db_time = Histogram("http_request_db_seconds", "Time spent in database queries", TIME_BUCKETS, ("method", "route"))
+request_db_queries = Histogram("http_request_db_queries", "Database queries per request", COUNT_BUCKETS, ("method", "route"))
+request_hash_time = Histogram("http_request_hash_seconds", "Time spent hashing passwords", TIME_BUCKETS, ("method", "route"))
+
+REQUEST_METRICS = (requests_total, request_duration, request_db_time, request_db_queries, request_hash_time)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time += time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+
+
+def instrument_engine(async_engine: AsyncEngine):
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: считает для каждого запроса число SQL-запросов, время в БД, время хеширования
+    и общее время обработчика, отдаёт их в заголовке Server-Timing и копит гистограммы по маршрутам для /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        stats_token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_time = time.perf_counter() - started
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.3f};desc="{stats.db_queries} queries", '
+                    f"hash;dur={stats.hash_time * 1000:.3f}, "
+                    f"app;dur={app_time * 1000:.3f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(stats_token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            requests_total.inc((*labels, str(status)))
+            request_duration.observe(labels, time.perf_counter() - started)
+            request_db_time.observe(labels, stats.db_time)
+            request_db_queries.observe(labels, stats.db_queries)
+            request_hash_time.observe(labels, stats.hash_time)
+
+
+def _render_gauges(prefix: str, values: dict) -> list[str]:
+    lines = []
+    for name, value in values.items():
+        if isinstance(value, (int, float)):
+            # bool — подкласс int, но в формате Prometheus значение должно быть числом: 1/0, а не True/False
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {int(value) if isinstance(value, bool) else value}")
+    return lines
+
+
+def render_metrics(extra: dict[str, dict] | None = None) -> str:
+    lines = []
+    for metric in REQUEST_METRICS:
+        lines += metric.render()
+    for prefix, values in (extra or {}).items():
+        lines += _render_gauges(prefix, values)
+    return "\n".join(lines) + "\n"
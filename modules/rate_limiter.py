@@ -0,0 +1,160 @@
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+
+
+def _env(route: str, name: str, default: float) -> float:
+    return float(os.getenv(f"RATE_LIMIT_{route.upper()}_{name}", default))
+
+
+class TokenBucketLimiter:
+    """Token bucket на ключ: rate токенов в секунду, не больше burst. Простаивающие ключи вытесняются по LRU."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Списывает токен и возвращает 0 или, если токенов нет, через сколько секунд повторить."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate if self.rate > 0 else math.inf
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class FailureLockout:
+    """Блокирует ключ на lockout секунд после max_failures неудач за скользящее окно window секунд."""
+
+    def __init__(self, max_failures: int, window: float, lockout: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout = lockout
+        self.max_keys = max_keys
+        self._failures: OrderedDict[str, deque[float]] = OrderedDict()
+        self._locked_until: OrderedDict[str, float] = OrderedDict()
+
+    def retry_after(self, key: str) -> float:
+        locked_until = self._locked_until.get(key)
+        if locked_until is None:
+            return 0.0
+        remaining = locked_until - time.monotonic()
+        if remaining <= 0:
+            del self._locked_until[key]
+            return 0.0
+        return remaining
+
+    def record_failure(self, key: str):
+        now = time.monotonic()
+        failures = self._failures.get(key)
+        if failures is None:
+            failures = self._failures[key] = deque()
+            if len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+        else:
+            self._failures.move_to_end(key)
+
+        failures.append(now)
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+
+        if len(failures) >= self.max_failures:
+            failures.clear()
+            self._locked_until[key] = now + self.lockout
+            self._locked_until.move_to_end(key)
+            if len(self._locked_until) > self.max_keys:
+                self._locked_until.popitem(last=False)
+
+    def has_recent_failures(self, key: str) -> bool:
+        if self.retry_after(key):
+            return True
+        failures = self._failures.get(key)
+        return bool(failures) and failures[-1] > time.monotonic() - self.window
+
+    def reset(self, key: str):
+        self._failures.pop(key, None)
+
+    def __len__(self):
+        return len(self._failures) + len(self._locked_until)
+
+
+class LoginThrottle:
+    """
+    Ограничение попыток входа для одного маршрута: token bucket по IP и по username
+    и блокировка после серии неудачных попыток. Параметры берутся из переменных
+    окружения RATE_LIMIT_<ROUTE>_*, поэтому для каждого маршрута задаются отдельно.
+
+    Неудачи считаются по паре IP + username: подбор пароля с одного адреса блокирует
+    только эту пару, и посторонний не может заблокировать вход владельцу аккаунта.
+    Блокировка IP после серии неудач по разным username не мешает входу под username,
+    по которому с этого IP неудач не было (за одним NAT или прокси могут быть разные
+    пользователи); перебор по многим username с такого IP сдерживает только token bucket по IP.
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.by_ip = TokenBucketLimiter(_env(route, "IP_RATE", 5), _env(route, "IP_BURST", 20))
+        self.by_username = TokenBucketLimiter(_env(route, "USERNAME_RATE", 0.5), _env(route, "USERNAME_BURST", 5))
+        window = _env(route, "FAILURE_WINDOW", 300)
+        lockout = _env(route, "LOCKOUT_SECONDS", 900)
+        self.ip_lockout = FailureLockout(int(_env(route, "IP_MAX_FAILURES", 50)), window, lockout)
+        self.pair_lockout = FailureLockout(int(_env(route, "USERNAME_MAX_FAILURES", 5)), window, lockout)
+
+        self.allowed = 0
+        self.rate_limited = 0
+        self.locked_out = 0
+
+    def check(self, ip: str, username: str) -> float:
+        """Возвращает 0, если попытку можно выполнять, иначе через сколько секунд повторить."""
+        pair = self._pair(ip, username)
+        retry_after = self.pair_lockout.retry_after(pair)
+        if not retry_after and self.pair_lockout.has_recent_failures(pair):
+            retry_after = self.ip_lockout.retry_after(ip)
+        if retry_after:
+            self.locked_out += 1
+            return retry_after
+
+        retry_after = max(self.by_ip.acquire(ip), self.by_username.acquire(username))
+        if retry_after:
+            self.rate_limited += 1
+            return retry_after
+
+        self.allowed += 1
+        return 0.0
+
+    @staticmethod
+    def _pair(ip: str, username: str) -> str:
+        return f"{ip} {username}"
+
+    def record_failure(self, ip: str, username: str):
+        self.ip_lockout.record_failure(ip)
+        self.pair_lockout.record_failure(self._pair(ip, username))
+
+    def record_success(self, ip: str, username: str):
+        self.pair_lockout.reset(self._pair(ip, username))
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rate_limited": self.rate_limited,
+            "locked_out": self.locked_out,
+            "tracked_keys": len(self.by_ip) + len(self.by_username) + len(self.ip_lockout) + len(self.pair_lockout),
+        }
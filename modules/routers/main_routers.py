@@ -1,48 +1,182 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+import csv
+import io
+import json
+import logging
+import math
+import os
+import secrets
 
-from modules.db.queryes import get_all_users, get_user_data, add_new_user, update_user_token, delete_user_data, update_user_data
-from modules.secrets_manager import verify_password, generate_token
+from enum import Enum
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+
+from modules.db.queryes import DB_INT_MAX, get_all_users, get_users_page, stream_users, get_user_data, get_token_owner, get_user_version, get_users_revision, add_new_user, add_new_users_bulk, add_user_token, delete_user_data, update_user_data, get_audit_events, get_session, utcnow
+from modules.secrets_manager import generate_token
+from modules.hashing_service import hashing_service
+from modules.db.jobs import schedule_password_rehash
+from modules.audit import audit_log
+from modules.token_cache import token_cache
+from modules.db.membership import membership_filters
+from modules.metrics import METRICS_TOKEN, render_metrics
+from modules.rate_limiter import LoginThrottle
+from modules.serialization import FAST_SERIALIZATION_ENABLED, TrustedJSONResponse, render_users_list, user_row_to_dict
+from modules.http_cache import etag_matches, not_modified, users_page_cache
 from models.pydantic_models import UserWithPassword, UserForRegistration, UserForUpdate
-from models.response_models import BaseResponse, UserDataResponse, AuthorizationResponse, UserUpdateResponse
+from models.response_models import BaseResponse, UserDataResponse, UsersPageResponse, AuthorizationResponse, BulkAddResponse, BulkAddRowResult, BulkAddStatus, UserUpdateResponse, HashingStatsResponse, TokenCacheStatsResponse, MembershipFilterStatsResponse, PageCacheStatsResponse, AuditEventsPageResponse, AuditStatsResponse
 from models.db_models import UserRole
 
+logger = logging.getLogger(__name__)
+
 class RoleChecker:
     def __init__(self, allowed_roles: list[str]):
         self.allowed_roles = allowed_roles
 
-    async def __call__(self, x_api_token: str = Header(..., alias="x-api-token")):
+    async def __call__(self, request: Request, x_api_token: str = Header(..., alias="x-api-token")):
         token = x_api_token
         if not token:
             raise HTTPException(status_code=401, detail="x-api-token is missing")
 
-        user = await get_user_data(token=token)
-        if not user:
-            raise HTTPException(
-                status_code=403,
-                detail="x-api-token is wrong!"
+        cached = token_cache.get(token)
+        if cached is not None:
+            user_id, username, role = cached
+        else:
+            generation = token_cache.generation
+            owner = await get_token_owner(token)
+            if not owner:
+                raise HTTPException(
+                    status_code=403,
+                    detail="x-api-token is wrong!"
+                )
+            user_id, username, role = owner.id, owner.username, owner.role
+            token_cache.set(
+                token,
+                owner.id,
+                owner.username,
+                role,
+                generation=generation,
+                max_age=(owner.expires_at - utcnow()).total_seconds()
             )
-        
-        if user.role not in self.allowed_roles:
+
+        if role not in self.allowed_roles:
             raise HTTPException(
                 status_code=403,
                 detail="User doesn't have permissions to perform this action!"
             )
 
-        return user.role
+        # кто выполняет запрос — для журнала аудита
+        request.state.actor_id = user_id
+        request.state.actor_username = username
+        return role
+
+
+BULK_ADD_MAX_ROWS = int(os.getenv("BULK_ADD_MAX_ROWS", 10000))
+
+auth_throttle = LoginThrottle("auth")
+
+
+def can_create_role(creator_role: str, role: str) -> bool:
+    return not (creator_role == "admin" and role in ("admin", "superadmin"))
+
+def protected_roles_for(editor_role: str) -> tuple[str, ...]:
+    """Роли пользователей, которых editor_role не может изменять и удалять."""
+    return ("admin", "superadmin") if editor_role == "admin" else ()
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+async def export_users_ndjson(role: str | None, since_id: int | None):
+    async for rows in stream_users(role=role, since_id=since_id):
+        yield "".join(
+            json.dumps({**row._asdict(), "role": row.role.value}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+async def export_users_csv(role: str | None, since_id: int | None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    # заголовок отдаётся до первой пачки: выгрузка без строк — это заголовок, а не пустое тело
+    writer.writerow(["id", "username", "email", "role"])
+    yield flush()
+    async for rows in stream_users(role=role, since_id=since_id):
+        writer.writerows((row.id, row.username, row.email, row.role.value) for row in rows)
+        yield flush()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
 
 
-async def check_user_password(user_data: UserWithPassword) -> dict:
-    user_db_data = await get_user_data(username=user_data.username)
-    if not user_db_data or not verify_password(user_data.password, user_db_data.password):
+async def audit(request: Request, action: str, target_username: str | None = None, details: dict | None = None):
+    await audit_log.record(
+        action,
+        actor_id=request.state.actor_id,
+        actor_username=request.state.actor_username,
+        target_username=target_username,
+        client_ip=client_ip(request),
+        details=details,
+    )
+
+
+def user_etag(user) -> str:
+    return f'"{user.id}-{user.version}"'
+
+
+async def check_metrics_token(authorization: str = Header(None)):
+    if METRICS_TOKEN is None:
+        return
+    if not secrets.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Metrics token is missing or wrong!")
+
+
+async def check_user_password(user_data: UserWithPassword, request: Request) -> dict:
+    ip = client_ip(request)
+    retry_after = auth_throttle.check(ip, user_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, try again later!",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+    user_db_data = await get_user_data(username=user_data.username, use_primary=True, with_password=True)
+    password_valid = False
+    if user_db_data:
+        try:
+            password_valid = await hashing_service.verify(user_data.password, user_db_data.password)
+        except ValueError:
+            # хеш схемы, которой нет в PASSWORD_HASH_SCHEMES, или повреждённый хеш
+            logger.error("Не удалось проверить хеш пароля пользователя %s", user_db_data.id)
+    if not password_valid:
+        auth_throttle.record_failure(ip, user_data.username)
+        await audit_log.record("auth.login_failed", actor_username=user_data.username, client_ip=ip)
         raise HTTPException(
             status_code=403,
             detail="User doesn't exist or password is wrong!"
         )
- 
+
+    auth_throttle.record_success(ip, user_data.username)
+    if hashing_service.needs_update(user_db_data.password):
+        schedule_password_rehash(user_db_data.id, user_data.password, user_db_data.password)
     return user_db_data
 
 main_router = APIRouter(prefix="/api/users", tags=['Управление пользователями'])
 auth_router = APIRouter(prefix="/api/auth", tags=['Авторизация пользователей'])
+service_router = APIRouter(prefix="/api/service", tags=['Служебные метрики'])
+audit_router = APIRouter(prefix="/api/audit", tags=['Журнал аудита'])
+metrics_router = APIRouter(tags=['Служебные метрики'])
 
 
 # АВТОРИЗАЦИЯ
@@ -54,14 +188,16 @@ auth_router = APIRouter(prefix="/api/auth", tags=['Авторизация пол
     responses={
         200: {"description": "Авторизация успешна."},
         403: {"description": "Неверный username или пароль."},
+        429: {"description": "Слишком много попыток входа, повторите после Retry-After секунд."},
     }
 )
-async def authorization(user_data = Depends(check_user_password)):
+async def authorization(request: Request, user_data = Depends(check_user_password)):
     token = generate_token()
-    success = await update_user_token(token, user_data.username)
+    success = await add_user_token(token, user_data.id)
     if not success:
         raise HTTPException(status_code=500, detail="Database error!")
     else:
+        await audit_log.record("auth.login", actor_id=user_data.id, actor_username=user_data.username, client_ip=client_ip(request))
         return AuthorizationResponse(x_api_token=token)
     
 
@@ -78,16 +214,99 @@ async def authorization(user_data = Depends(check_user_password)):
     - Параметр offset задаёт смещение для пагинации.
     - Параметр role фильтрует пользователей по роли.
     - Параметры order_by и order_desc позволяют сортировать результаты по id, username или role.
+    - Ответ содержит ETag, который меняется при любом изменении пользователей; с заголовком If-None-Match
+      неизменившийся список возвращается как 304 без тела.
     - Требуется x-api-token в headers с правами 'admin' или 'superadmin'.
     """,
     responses={
         200: {"description": "Список данных сформирован успешно."},
+        304: {"description": "Список не изменился с указанного в If-None-Match ETag."},
         403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
     }
 )
-async def get_list(limit: int = 100, offset: int = 0, role: UserRole = None, order_by: str = "id", order_desc: bool = False):
-    users_list = await get_all_users(limit=limit, offset=offset, role=role, order_by=order_by, order_desc=order_desc)
-    return users_list
+async def get_list(
+    limit: int = 100,
+    offset: int = 0,
+    role: UserRole = None,
+    order_by: str = "id",
+    order_desc: bool = False,
+    if_none_match: str = Header(None, alias="If-None-Match"),
+):
+    revision = await get_users_revision()
+    etag = f'"users-{revision}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # те же ограничения, что в get_all_users: limit=-1 не должен попадать в кэш как «вся таблица»
+    page_key = (role, order_by if order_by in ("username", "role") else "id", order_desc, max(0, offset), max(0, min(limit, 100)))
+    body = users_page_cache.get(page_key, revision)
+    if body is None:
+        users_list = await get_all_users(limit=limit, offset=offset, role=role, order_by=order_by, order_desc=order_desc)
+        body = render_users_list(users_list)
+        users_page_cache.set(page_key, revision, body)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+@main_router.get(
+    "/get_page",
+    dependencies=[Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))],
+    response_model=UsersPageResponse,
+    summary="Получить страницу пользователей по курсору",
+    description="""
+    Возвращает страницу пользователей и курсор следующей страницы (keyset-пагинация).
+    В отличие от /get_list, стоимость запроса не зависит от глубины страницы.
+
+    - Параметр limit ограничивает количество возвращаемых записей (макс. 100).
+    - Параметр cursor — значение next_cursor из предыдущего ответа (для первой страницы не передаётся).
+    - Параметр role фильтрует пользователей по роли.
+    - Параметры order_by и order_desc позволяют сортировать результаты по id, username или role.
+      При переходе по курсору они должны совпадать с параметрами первого запроса.
+    - Требуется x-api-token в headers с правами 'admin' или 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Страница сформирована успешно."},
+        400: {"description": "Курсор повреждён или не соответствует сортировке."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_page(limit: int = 100, cursor: str = None, role: UserRole = None, order_by: str = "id", order_desc: bool = False):
+    try:
+        users_list, next_cursor = await get_users_page(limit=limit, cursor=cursor, role=role, order_by=order_by, order_desc=order_desc)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if FAST_SERIALIZATION_ENABLED:
+        return TrustedJSONResponse({"items": [user_row_to_dict(row) for row in users_list], "next_cursor": next_cursor})
+    return UsersPageResponse(items=users_list, next_cursor=next_cursor)
+
+@main_router.get(
+    "/export",
+    dependencies=[Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))],
+    summary="Выгрузить всех пользователей",
+    description="""
+    Потоково выгружает всех пользователей в формате NDJSON или CSV, упорядоченных по id.
+    Память сервера не зависит от размера таблицы.
+
+    - Параметр format задаёт формат выгрузки: ndjson (по умолчанию) или csv.
+    - Параметр role фильтрует пользователей по роли.
+    - Параметр since_id выгружает только пользователей с id больше указанного (для инкрементальной синхронизации).
+    - Требуется x-api-token в headers с правами 'admin' или 'superadmin'.
+    """,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Выгрузка начата.",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def export_users(
+    format: ExportFormat = ExportFormat.ndjson,
+    role: UserRole = None,
+    since_id: int = Query(None, ge=0, le=DB_INT_MAX),
+):
+    if format == ExportFormat.csv:
+        return StreamingResponse(export_users_csv(role, since_id), media_type="text/csv")
+    return StreamingResponse(export_users_ndjson(role, since_id), media_type="application/x-ndjson")
 
 @main_router.get(
     "/get_user",
@@ -97,19 +316,32 @@ async def get_list(limit: int = 100, offset: int = 0, role: UserRole = None, ord
     Поиск пользователя по username.
 
     - Необхоодимо передать username в query-параметрах (Учитывая регистр).
+    - Ответ содержит ETag версии пользователя; с заголовком If-None-Match неизменившиеся данные возвращаются как 304 без тела.
     - Требуется любой x-api-token в headers.
     """,
     responses={
         200: {"description": "Пользователь найден."},
+        304: {"description": "Данные пользователя не изменились с указанного в If-None-Match ETag."},
         403: {"description": "Нет доступа (отсутствует верный x-api-token)."},
         404: {"description": "Пользователь не найден."},
     }
 )
-async def get_user(username: str = None, user_role = Depends(RoleChecker(allowed_roles=["user", "admin", "superadmin"]))):
+async def get_user(
+    response: Response,
+    username: str = None,
+    if_none_match: str = Header(None, alias="If-None-Match"),
+    user_role = Depends(RoleChecker(allowed_roles=["user", "admin", "superadmin"])),
+):
+    if if_none_match:
+        user_version = await get_user_version(username)
+        if user_version is not None and etag_matches(if_none_match, user_etag(user_version)):
+            return not_modified(user_etag(user_version))
+
     user_data = await get_user_data(username)
 
     if user_data is None:
-        raise HTTPException(status_code=404, detail=f"User {user_data.username} not found!")
+        raise HTTPException(status_code=404, detail=f"User {username} not found!")
+    response.headers["ETag"] = user_etag(user_data)
     return user_data
 
 @main_router.post(
@@ -127,8 +359,8 @@ async def get_user(username: str = None, user_role = Depends(RoleChecker(allowed
         403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
     }
 )
-async def add_user(user_data: UserForRegistration, user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))):
-    if user_role == "admin" and user_data.role == "superadmin" or user_role == "admin" and user_data.role == "admin":
+async def add_user(request: Request, user_data: UserForRegistration, user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))):
+    if not can_create_role(user_role, user_data.role):
         raise HTTPException(status_code=403, detail="Admin can't create superadmin and admin users!")
     success = await add_new_user(
         username=user_data.username,
@@ -138,12 +370,137 @@ async def add_user(user_data: UserForRegistration, user_role = Depends(RoleCheck
         )
 
     if success:
+        await audit(request, "user.create", user_data.username, {"role": user_data.role})
         return BaseResponse(
             msg=f"User {user_data.username} successfully added!"
         )
     else:
         raise HTTPException(status_code=500, detail="Database error!")
     
+@main_router.post(
+    "/bulk_add",
+    response_model=BulkAddResponse,
+    summary="Создать пользователей пачкой",
+    description=f"""Регистрирует много пользователей за один запрос.
+
+    - Тело запроса: JSON-массив (Content-Type: application/json) или NDJSON, по одному пользователю в строке
+      (Content-Type: application/x-ndjson). Каждый элемент имеет тот же формат, что и в /add_new.
+    - Не более {BULK_ADD_MAX_ROWS} пользователей за запрос.
+    - Ошибка в одной строке не отменяет остальные: результат возвращается по каждой строке
+      (created / duplicate / invalid / forbidden / retry). Строка NDJSON, которая не разбирается как JSON, получает статус invalid.
+    - Если сервис хеширования паролей перегружен, непрошедшие строки получают статус retry (и заголовок Retry-After):
+      уже созданные пользователи остаются, строки со статусом retry можно отправить повторно.
+    - Требуется x-api-token в headers с правами 'admin' или 'superadmin'.
+    - Только 'superadmin' может создавать пользователей с ролью 'superadmin' или 'admin'.
+    """,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": UserForRegistration.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+    responses={
+        200: {"description": "Пачка обработана, результат по каждой строке в теле ответа."},
+        400: {"description": "Тело запроса (application/json) не является JSON-массивом."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+        413: {"description": "Слишком много пользователей в одном запросе."},
+    }
+)
+async def bulk_add_users(
+    request: Request,
+    response: Response,
+    user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"])),
+):
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        # битая строка не отменяет остальные: вместо элемента сохраняется ошибка разбора
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(e)
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON!")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON!")
+    if len(items) > BULK_ADD_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"No more than {BULK_ADD_MAX_ROWS} users per request!")
+
+    results = []
+    to_create = {}
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results.append(BulkAddRowResult(index=index, status=BulkAddStatus.invalid, detail=f"Malformed JSON line: {item}"))
+            continue
+
+        username = item.get("username") if isinstance(item, dict) else None
+        try:
+            user_data = UserForRegistration.model_validate(item)
+        except ValidationError as e:
+            results.append(BulkAddRowResult(index=index, username=username, status=BulkAddStatus.invalid, detail=str(e)))
+            continue
+
+        if not can_create_role(user_role, user_data.role):
+            results.append(BulkAddRowResult(
+                index=index,
+                username=user_data.username,
+                status=BulkAddStatus.forbidden,
+                detail="Admin can't create superadmin and admin users!"
+            ))
+        elif user_data.username in to_create:
+            results.append(BulkAddRowResult(
+                index=index,
+                username=user_data.username,
+                status=BulkAddStatus.duplicate,
+                detail="Username is repeated in this batch!"
+            ))
+        else:
+            to_create[user_data.username] = (index, user_data)
+            results.append(BulkAddRowResult(index=index, username=user_data.username, status=BulkAddStatus.created))
+
+    created = await add_new_users_bulk([
+        {
+            "username": user_data.username,
+            "password": user_data.password,
+            "email": user_data.email,
+            "role": user_data.role,
+        }
+        for _, user_data in to_create.values()
+    ])
+
+    for username, (index, user_data) in to_create.items():
+        if created[username] is None:
+            results[index].status = BulkAddStatus.retry
+            results[index].detail = "Password hashing service is overloaded, try again later!"
+            response.headers["Retry-After"] = "1"
+        elif not created[username]:
+            results[index].status = BulkAddStatus.duplicate
+            results[index].detail = f"User {username} already exists!"
+        else:
+            await audit(request, "user.create", username, {"role": user_data.role, "bulk": True})
+
+    counts = {status: 0 for status in BulkAddStatus}
+    for result in results:
+        counts[result.status] += 1
+
+    return BulkAddResponse(
+        created=counts[BulkAddStatus.created],
+        duplicates=counts[BulkAddStatus.duplicate],
+        invalid=counts[BulkAddStatus.invalid],
+        forbidden=counts[BulkAddStatus.forbidden],
+        retry=counts[BulkAddStatus.retry],
+        results=results,
+    )
+
 @main_router.delete(
     "/delete_user",
     response_model=BaseResponse,
@@ -159,16 +516,20 @@ async def add_user(user_data: UserForRegistration, user_role = Depends(RoleCheck
     404: {"description": "Пользователь не найден."},
     }
 )
-async def delete_user(username: str, user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))):
-    if user_role == "admin":
-        user_db_data = await get_user_data(username=username)
-        if user_db_data.role in ["admin", "superadmin"]:
-            raise HTTPException(status_code=403, detail="Admin can't delete admin and superadmin users!")
-    success = await delete_user_data(username=username)
+async def delete_user(
+    request: Request,
+    username: str,
+    user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"])),
+    session: AsyncSession = Depends(get_session),
+):
+    success = await delete_user_data(username=username, protected_roles=protected_roles_for(user_role), session=session)
 
     if not success:
+        if await get_user_data(username=username, session=session) is not None:
+            raise HTTPException(status_code=403, detail="Admin can't delete admin and superadmin users!")
         raise HTTPException(status_code=404, detail=f"User {username} not found!")
 
+    await audit(request, "user.delete", username)
     return BaseResponse(
         msg=f"User {username} successfully deleted!"
     )
@@ -189,34 +550,219 @@ async def delete_user(username: str, user_role = Depends(RoleChecker(allowed_rol
     404: {"description": "Пользователь не найден."}
     }
 )
-async def update_user(user_data: UserForUpdate, user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))):
+async def update_user(
+    request: Request,
+    user_data: UserForUpdate,
+    user_role = Depends(RoleChecker(allowed_roles=["admin", "superadmin"])),
+    session: AsyncSession = Depends(get_session),
+):
     if user_role == "admin" and user_data.role in ['admin', 'user']:
         raise HTTPException(status_code=403, detail="Only superadmin can update users with admin roles!")
 
-    user_to_change = await get_user_data(username=user_data.username)
+    try:
+        user_to_change = await update_user_data(
+            user_data.username,
+            user_data.new_username,
+            user_data.email,
+            user_data.role,
+            user_data.password,
+            protected_roles=protected_roles_for(user_role),
+            session=session
+            )
+    except IntegrityError:
+        raise HTTPException(status_code=500, detail="Database error!")
+
     if user_to_change is None:
+        if await get_user_data(username=user_data.username, session=session) is not None:
+            raise HTTPException(status_code=403, detail="Only superadmin can update users with admin roles!")
         raise HTTPException(status_code=404, detail=f"User {user_data.username} not found!")
 
-    if user_to_change.role in ["admin", "superadmin"] and user_role == "admin":
-        raise HTTPException(status_code=403, detail="Only superadmin can update users with admin roles!")
-    
-    success = await update_user_data(
-        user_data.username,
-        user_data.new_username,
-        user_data.email,
-        user_data.role,
-        user_data.password
-        )
-    
-    user_to_change = await get_user_data(username=user_data.new_username)
+    # пароль в журнал не попадает — только факт его смены
+    changed = user_data.model_dump(mode="json", exclude={"username", "password"}, exclude_none=True)
+    if user_data.password is not None:
+        changed["password"] = "changed"
+    await audit(request, "user.update", user_data.username, changed)
+    return UserUpdateResponse(
+        msg="User successfully updated!",
+        username=user_data.username,
+        new_username=user_to_change.username,
+        email=user_to_change.email,
+        role=user_to_change.role,
+    )
 
-    if success:
-        return UserUpdateResponse(
-            msg="User successfully updated!",
-            username=user_data.username,
-            new_username=user_to_change.username,
-            email=user_to_change.email,
-            role=user_to_change.role,
-        )
-    else:
-        raise HTTPException(status_code=500, detail="Database error!")
\ No newline at end of file
+
+# ЖУРНАЛ АУДИТА
+@audit_router.get(
+    "/events",
+    dependencies=[Depends(RoleChecker(allowed_roles=["admin", "superadmin"]))],
+    response_model=AuditEventsPageResponse,
+    summary="Получить события журнала аудита",
+    description="""
+    Возвращает события журнала аудита от новых к старым: создание, изменение и удаление пользователей,
+    успешные и неудачные входы. События пишутся асинхронно и появляются в журнале с задержкой до нескольких секунд.
+
+    - Параметр limit ограничивает количество возвращаемых записей (макс. 100).
+    - Параметр before_id — значение next_before_id из предыдущего ответа (для первой страницы не передаётся).
+    - Параметры action, actor и target фильтруют события по действию, исполнителю и пользователю, над которым выполнено действие.
+    - Требуется x-api-token в headers с правами 'admin' или 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Страница журнала сформирована успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_audit_log(
+    limit: int = Query(100, ge=1),
+    before_id: int = Query(None, ge=0, le=DB_INT_MAX),
+    action: str = None,
+    actor: str = None,
+    target: str = None,
+):
+    events, next_before_id = await get_audit_events(limit=limit, before_id=before_id, action=action, actor=actor, target=target)
+    return AuditEventsPageResponse(items=events, next_before_id=next_before_id)
+
+
+# СЛУЖЕБНЫЕ ЭНДПОИНТЫ
+@service_router.get(
+    "/hashing_stats",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=HashingStatsResponse,
+    summary="Метрики пула хеширования паролей",
+    description="""
+    Возвращает состояние пула хеширования паролей: размер пула, глубину очереди,
+    количество выполненных и отклонённых задач, время ожидания в очереди и время самого хеширования (в секундах).
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_hashing_stats():
+    return hashing_service.stats()
+
+
+@service_router.get(
+    "/token_cache_stats",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=TokenCacheStatsResponse,
+    summary="Метрики кэша токенов",
+    description="""
+    Возвращает размер кэша токенов и счётчики попаданий, промахов, вытеснений и инвалидаций.
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_token_cache_stats():
+    return token_cache.stats()
+
+
+@service_router.get(
+    "/page_cache_stats",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=PageCacheStatsResponse,
+    summary="Метрики кэша страниц списка пользователей",
+    description="""
+    Возвращает размер кэша готовых ответов /api/users/get_list и счётчики попаданий, промахов
+    и страниц, отброшенных после изменения пользователей.
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_page_cache_stats():
+    return users_page_cache.stats()
+
+
+@service_router.get(
+    "/audit_stats",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=AuditStatsResponse,
+    summary="Метрики журнала аудита",
+    description="""
+    Возвращает заполненность очереди журнала аудита и счётчики принятых, записанных, отброшенных
+    и не записанных из-за ошибок БД событий.
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_audit_stats():
+    return audit_log.stats()
+
+
+@service_router.get(
+    "/membership_filter_stats",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=MembershipFilterStatsResponse,
+    summary="Метрики фильтров несуществующих пользователей и токенов",
+    description="""
+    Возвращает состояние Bloom-фильтров по username и токенам: сколько проверок отсечено без запроса к БД,
+    наблюдаемую и расчётную долю ложных срабатываний.
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def get_membership_filter_stats():
+    return membership_filters.stats()
+
+@service_router.post(
+    "/rebuild_membership_filters",
+    dependencies=[Depends(RoleChecker(allowed_roles=["superadmin"]))],
+    response_model=MembershipFilterStatsResponse,
+    summary="Перестроить фильтры несуществующих пользователей и токенов",
+    description="""
+    Перестраивает Bloom-фильтры по текущему содержимому БД (например, после массового удаления пользователей или токенов).
+    Остальные воркеры перестраивают свои фильтры при следующей проверке.
+
+    - Требуется x-api-token в headers с правами 'superadmin'.
+    """,
+    responses={
+        200: {"description": "Фильтры перестроены."},
+        403: {"description": "Нет доступа (отсутствует верный x-api-token или недостаточно привелегий)."},
+    }
+)
+async def rebuild_membership_filters():
+    await membership_filters.rebuild_everywhere()
+    return membership_filters.stats()
+
+
+@metrics_router.get(
+    "/metrics",
+    dependencies=[Depends(check_metrics_token)],
+    response_class=PlainTextResponse,
+    summary="Метрики в формате Prometheus",
+    description="""
+    Гистограммы по маршрутам: время обработки, время в БД, число SQL-запросов и время хеширования паролей,
+    а также состояние пула хеширования и кэша токенов. Метрики считаются отдельно в каждом процессе.
+    - Если задан METRICS_TOKEN, требуется заголовок Authorization: Bearer <METRICS_TOKEN>.
+    """,
+    responses={
+        200: {"description": "Метрики сформированы успешно.", "content": {"text/plain": {}}},
+        401: {"description": "Задан METRICS_TOKEN, а заголовок Authorization отсутствует или неверен."},
+    }
+)
+async def get_metrics():
+    return render_metrics({
+        "password_hashing": hashing_service.stats(),
+        "token_cache": token_cache.stats(),
+        "users_page_cache": users_page_cache.stats(),
+        "audit_log": audit_log.stats(),
+        "auth_throttle": auth_throttle.stats(),
+        "membership_filter": membership_filters.stats(),
+    })
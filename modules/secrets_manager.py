@@ -1,16 +1,63 @@
-from passlib.context import CryptContext
+import hashlib
+import os
 import secrets
 import string
+from functools import cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Первая схема используется для новых хешей, остальные только проверяются и перехешируются при входе
+PASSWORD_HASH_SCHEMES = [scheme.strip() for scheme in os.getenv("PASSWORD_HASH_SCHEMES", "bcrypt").split(",") if scheme.strip()]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Схема, которой хешировались пароли до появления PASSWORD_HASH_SCHEMES: её хеши проверяются при любой настройке
+LEGACY_HASH_SCHEME = "bcrypt"
+# argon2 требует пакет argon2-cffi
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # КиБ
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 1))
+
+def build_pwd_context(
+    schemes: list[str] = PASSWORD_HASH_SCHEMES,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST,
+    argon2_parallelism: int = ARGON2_PARALLELISM,
+):
+    """
+    CryptContext с заданной стоимостью. Хеш другой схемы или с другой стоимостью
+    считается устаревшим (needs_update) — так стоимость можно и повышать, и понижать.
+    bcrypt добавляется в конец списка, если его нет: старые хеши проверяются и перехешируются при входе.
+    """
+    from passlib.context import CryptContext
+
+    if LEGACY_HASH_SCHEME not in schemes:
+        schemes = [*schemes, LEGACY_HASH_SCHEME]
+    settings = {}
+    if "bcrypt" in schemes:
+        settings.update(bcrypt__rounds=bcrypt_rounds, bcrypt__min_rounds=bcrypt_rounds, bcrypt__max_rounds=bcrypt_rounds)
+    if "argon2" in schemes:
+        settings.update(
+            argon2__time_cost=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+@cache
+def get_pwd_context():
+    # passlib импортируется при первом хешировании, а не при старте приложения
+    return build_pwd_context()
 
 def hash_password(password: str) -> str:
-    print(password)
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return get_pwd_context().verify(password, hashed_password)
+
+def password_needs_update(hashed_password: str) -> bool:
+    return get_pwd_context().needs_update(hashed_password)
 
 def generate_token(length=32):
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
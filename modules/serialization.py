@@ -0,0 +1,50 @@
+import json
+import os
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+from models.response_models import UserDataResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_SERIALIZATION_ENABLED = os.getenv("FAST_SERIALIZATION_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def dumps(content) -> bytes:
+    """Те же байты, что у JSONResponse: компактные разделители, не-ASCII символы без экранирования."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def user_row_to_dict(row: Row) -> dict:
+    """
+    Строка (id, username, email, role) из БД в словарь схемы UserDataResponse без повторной валидации.
+    Email сохраняется только через EmailStr, поэтому в БД он уже в нормализованном виде.
+    """
+    return {"id": row.id, "username": row.username, "email": row.email, "role": row.role.value}
+
+
+_users_list_adapter = TypeAdapter(list[UserDataResponse])
+
+
+def render_users_list(rows: list[Row]) -> bytes:
+    """Тело ответа со списком пользователей — те же байты, что FastAPI выдаёт через response_model list[UserDataResponse]."""
+    if FAST_SERIALIZATION_ENABLED:
+        return dumps([user_row_to_dict(row) for row in rows])
+    users = _users_list_adapter.validate_python(rows, from_attributes=True)
+    return dumps(_users_list_adapter.dump_python(users, mode="json"))
+
+
+class TrustedJSONResponse(Response):
+    """JSON-ответ из уже проверенных данных БД: минует response_model и валидацию FastAPI."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,73 @@
+import fcntl
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+# Путь к файлу общего состояния; задаётся main.py при запуске нескольких воркеров.
+# Если не задан, счётчики живут только в памяти текущего процесса.
+APP_SHARED_STATE_PATH = os.getenv("APP_SHARED_STATE_PATH")
+
+SLOT_NAMES = ("token_cache", "membership_added", "membership_reset")
+SLOT_SIZE = 8
+
+
+class SharedCounters:
+    """
+    Счётчики поколений, общие для всех воркеров: по 8 байт на слот в mmap-файле.
+
+    Процесс, изменивший данные, увеличивает счётчик (bump), остальные сравнивают
+    его со своим последним значением (get) и сбрасывают локальный кэш при расхождении.
+    Чтение — без блокировки, увеличение — под flock.
+    """
+
+    def __init__(self, path: str | None = APP_SHARED_STATE_PATH):
+        self.path = path
+        size = SLOT_SIZE * len(SLOT_NAMES)
+        if path is None:
+            self._fd = None
+            self._buffer = bytearray(size)
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._buffer = mmap.mmap(self._fd, size)
+
+    def _offset(self, slot: str) -> int:
+        return SLOT_NAMES.index(slot) * SLOT_SIZE
+
+    def get(self, slot: str) -> int:
+        return struct.unpack_from("<Q", self._buffer, self._offset(slot))[0]
+
+    def bump(self, slot: str) -> int:
+        offset = self._offset(slot)
+        with self._locked():
+            value = struct.unpack_from("<Q", self._buffer, offset)[0] + 1
+            struct.pack_into("<Q", self._buffer, offset, value)
+        return value
+
+    @contextmanager
+    def _locked(self):
+        if self._fd is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Межпроцессная блокировка на время блока (например, чтобы только один воркер создавал схему БД)."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+shared_counters = SharedCounters()
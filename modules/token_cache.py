@@ -0,0 +1,127 @@
+import os
+import time
+from collections import OrderedDict
+
+from modules.shared_state import SharedCounters, shared_counters
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 60))
+
+
+class TokenCache:
+    """
+    TTL + LRU кэш token -> (id пользователя, username, роль) для RoleChecker.
+
+    Записи удаляются явно через invalidate_user() при смене токена, изменении
+    или удалении пользователя. generation позволяет не сохранять в кэш данные,
+    прочитанные из БД до инвалидации. Инвалидация в другом воркере видна через
+    общий счётчик и сбрасывает кэш этого процесса целиком.
+    """
+
+    def __init__(
+        self,
+        max_size: int = TOKEN_CACHE_SIZE,
+        ttl: float = TOKEN_CACHE_TTL,
+        counters: SharedCounters = shared_counters,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._counters = counters
+        self._shared_generation = counters.get("token_cache")
+        self._entries: OrderedDict[str, tuple[int, str, str, float]] = OrderedDict()
+        self._tokens_by_username: dict[str, set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _sync(self):
+        shared_generation = self._counters.get("token_cache")
+        if shared_generation != self._shared_generation:
+            self._shared_generation = shared_generation
+            self.clear()
+
+    def get(self, token: str) -> tuple[int, str, str] | None:
+        self._sync()
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, username, role, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user_id, username, role
+
+    def set(
+        self,
+        token: str,
+        user_id: int,
+        username: str,
+        role: str,
+        generation: int | None = None,
+        max_age: float | None = None,
+    ):
+        if self.max_size <= 0:
+            return
+        self._sync()
+        if generation is not None and generation != self.generation:
+            return
+
+        if token in self._entries:
+            self._remove(token)
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        self._entries[token] = (user_id, username, role, time.monotonic() + ttl)
+        self._tokens_by_username.setdefault(username, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest_token = next(iter(self._entries))
+            self._remove(oldest_token)
+            self.evictions += 1
+
+    def invalidate_user(self, username: str):
+        shared_generation = self._counters.bump("token_cache")
+        if shared_generation == self._shared_generation + 1:
+            # между нашими инвалидациями других не было — локальный кэш сбрасывать не нужно
+            self._shared_generation = shared_generation
+        self.generation += 1
+        for token in self._tokens_by_username.pop(username, set()):
+            self._entries.pop(token, None)
+            self.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._tokens_by_username.clear()
+
+    def _remove(self, token: str):
+        _, username, _, _ = self._entries.pop(token)
+        tokens = self._tokens_by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_username[username]
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+token_cache = TokenCache()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# настройки читаются при импорте модулей приложения, поэтому задаются до них
+TEST_DIR = tempfile.mkdtemp(prefix="test-task-")
+os.environ.update({
+    "SQLALCHEMY_DATABASE_URL": f"sqlite+aiosqlite:///{TEST_DIR}/test.db",
+    "APP_SHARED_STATE_PATH": f"{TEST_DIR}/shared.state",
+    "SUPER_ADMIN_USERNAME": "test_superadmin",
+    "SUPER_ADMIN_PASSWORD": "test-password",
+    "BCRYPT_ROUNDS": "4",
+    # каждый тест входит заново под одним username
+    "RATE_LIMIT_AUTH_USERNAME_BURST": "1000",
+    "RATE_LIMIT_AUTH_IP_BURST": "1000",
+})
+for name in ("SQLALCHEMY_READ_DATABASE_URL", "APP_SCHEMA_READY"):
+    os.environ.pop(name, None)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database():
+    """Пустая база с текущей схемой и суперадмином для каждого теста."""
+    from main import prepare_database
+    from modules.db.database import engine, metadata_obj
+
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata_obj.drop_all)
+    await prepare_database()
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(database):
+    """
+    Клиент приложения в том же процессе через ASGI, как в benchmarks/bench_api.py,
+    с токеном суперадмина в заголовках. Токен уже в кэше, фильтры пользователей построены.
+    """
+    from main import app
+    from modules.db.membership import membership_filters
+
+    credentials = {"username": os.environ["SUPER_ADMIN_USERNAME"], "password": os.environ["SUPER_ADMIN_PASSWORD"]}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/auth", json=credentials)
+            assert response.status_code == 200, response.text
+            client.headers["x-api-token"] = response.json()["x_api_token"]
+            # первый запрос с токеном проверяет его по БД, дальше он берётся из кэша
+            response = await client.get("/api/users/get_user", params={"username": credentials["username"]})
+            assert response.status_code == 200, response.text
+            # фильтры строятся в фоне при старте
+            while not membership_filters.ready:
+                await asyncio.sleep(0.01)
+            yield client
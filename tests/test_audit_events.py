@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("params", [
+    {"before_id": 10**30},
+    {"before_id": -1},
+    {"limit": 0},
+    {"limit": -5},
+])
+async def test_out_of_range_paging_is_rejected(client, params):
+    response = await client.get("/api/audit/events", params=params)
+
+    assert response.status_code == 422
+
+
+async def test_first_page(client):
+    response = await client.get("/api/audit/events", params={"limit": 1})
+
+    assert response.status_code == 200
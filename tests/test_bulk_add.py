@@ -0,0 +1,59 @@
+import json
+from functools import partial
+
+import pytest
+
+from modules.audit import audit_log
+from modules.db import queryes
+from modules.hashing_service import HashingServiceBusy, hashing_service
+from modules.routers import main_routers
+
+pytestmark = pytest.mark.anyio
+
+
+def ndjson(*lines: str) -> bytes:
+    return "\n".join(lines).encode()
+
+
+async def test_malformed_ndjson_line_is_invalid_row(client):
+    body = ndjson(
+        json.dumps({"username": "alice", "password": "Strong_Password_123%"}),
+        '{"username": "bob", "password": ',
+        json.dumps({"username": "carol", "password": "Strong_Password_123%"}),
+    )
+
+    response = await client.post(
+        "/api/users/bulk_add",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert [row["status"] for row in response.json()["results"]] == ["created", "invalid", "created"]
+    assert response.json()["invalid"] == 1
+
+
+async def test_busy_hashing_marks_chunk_for_retry(client, monkeypatch):
+    hash_many = hashing_service.hash_many
+    calls = 0
+
+    async def busy_after_first_chunk(passwords):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise HashingServiceBusy()
+        return await hash_many(passwords)
+
+    monkeypatch.setattr(hashing_service, "hash_many", busy_after_first_chunk)
+    monkeypatch.setattr(main_routers, "add_new_users_bulk", partial(queryes.add_new_users_bulk, chunk_size=2))
+    recorded = audit_log.recorded
+
+    users = [{"username": f"user{i}", "password": "Strong_Password_123%"} for i in range(4)]
+    response = await client.post("/api/users/bulk_add", json=users)
+
+    assert response.status_code == 200
+    assert response.headers["Retry-After"] == "1"
+    assert [row["status"] for row in response.json()["results"]] == ["created", "created", "retry", "retry"]
+    assert response.json()["retry"] == 2
+    # события аудита для созданной пачки записаны
+    assert audit_log.recorded - recorded == 2
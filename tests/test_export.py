@@ -0,0 +1,17 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("since_id", [-1, 10**30])
+async def test_since_id_out_of_range_is_rejected(client, since_id):
+    response = await client.get("/api/users/export", params={"since_id": since_id})
+
+    assert response.status_code == 422
+
+
+async def test_empty_csv_export_has_header(client):
+    response = await client.get("/api/users/export", params={"format": "csv", "role": "admin"})
+
+    assert response.status_code == 200
+    assert response.text == "id,username,email,role\r\n"
@@ -0,0 +1,16 @@
+import pytest
+
+from modules.db.queryes import add_new_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("limit, expected", [(-1, 0), (0, 0), (1, 1), (1000, 3)])
+async def test_limit_is_clamped(client, limit, expected):
+    for username in ("alice", "bob"):
+        await add_new_user(username, "Strong_Password_123%", "user")
+
+    response = await client.get("/api/users/get_list", params={"limit": limit})
+
+    assert response.status_code == 200
+    assert len(response.json()) == expected
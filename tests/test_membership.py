@@ -0,0 +1,47 @@
+import os
+
+import pytest
+from sqlalchemy import delete
+
+from models.db_models import UserTokensOrm
+from modules.db.membership import MembershipFilters
+from modules.db.queryes import add_new_user, add_user_token, delete_user_data, get_user_data, session_factory
+from modules.secrets_manager import hash_token
+from modules.shared_state import SharedCounters
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Strong_Password_123%"
+
+
+async def other_worker() -> MembershipFilters:
+    """Фильтры второго воркера: свои Bloom-фильтры, общие с этим процессом счётчики."""
+    filters = MembershipFilters(enabled=True, counters=SharedCounters(os.environ["APP_SHARED_STATE_PATH"]))
+    await filters.rebuild()
+    return filters
+
+
+async def test_user_created_after_delete_is_visible_to_other_worker(database):
+    for username in ("alice", "bob", "carol"):
+        await add_new_user(username, PASSWORD, "user")
+    worker = await other_worker()
+
+    # без AUTOINCREMENT новый пользователь получил бы id удалённого и не попал бы в догрузку по id
+    assert await delete_user_data("carol")
+    await add_new_user("dave", PASSWORD, "user")
+
+    assert await worker.might_contain_username("dave")
+
+
+async def test_token_created_after_delete_is_visible_to_other_worker(database):
+    await add_new_user("alice", PASSWORD, "user")
+    user = await get_user_data("alice", use_primary=True)
+    await add_user_token("first-token", user.id)
+    worker = await other_worker()
+
+    async with session_factory() as session:
+        await session.execute(delete(UserTokensOrm))
+        await session.commit()
+    await add_user_token("second-token", user.id)
+
+    assert await worker.might_contain_token(hash_token("second-token"))
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+
+from modules.metrics import render_metrics
+from modules.routers import main_routers
+
+pytestmark = pytest.mark.anyio
+
+
+def test_gauges_are_numeric():
+    text = render_metrics({"audit_log": {"enabled": True, "ready": False, "written": 3, "scheme": "bcrypt"}})
+
+    assert "audit_log_enabled 1\n" in text
+    assert "audit_log_ready 0\n" in text
+    assert "audit_log_written 3\n" in text
+    assert "audit_log_scheme" not in text
+
+
+@pytest.mark.parametrize("authorization, allowed", [
+    (None, False),
+    ("Bearer wrong", False),
+    ("secret", False),
+    ("Bearer secret", True),
+])
+async def test_metrics_token(monkeypatch, authorization, allowed):
+    monkeypatch.setattr(main_routers, "METRICS_TOKEN", "secret")
+
+    if allowed:
+        await main_routers.check_metrics_token(authorization)
+    else:
+        with pytest.raises(HTTPException) as error:
+            await main_routers.check_metrics_token(authorization)
+        assert error.value.status_code == 401
+
+
+async def test_metrics_without_token_are_open(monkeypatch):
+    monkeypatch.setattr(main_routers, "METRICS_TOKEN", None)
+
+    await main_routers.check_metrics_token(None)
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import inspect
+
+from main import prepare_database
+from modules.db.database import engine, metadata_obj
+from modules.db.queryes import add_new_user, get_all_users, get_users_revision, update_password_hash
+
+pytestmark = pytest.mark.anyio
+
+# схема users и user_tokens в том виде, в каком её создавали прежние версии приложения
+LEGACY_SCHEMA = (
+    "CREATE TABLE users (id INTEGER NOT NULL, username VARCHAR NOT NULL, password VARCHAR NOT NULL, "
+    "email VARCHAR, role VARCHAR(10) NOT NULL, PRIMARY KEY (id), UNIQUE (username))",
+    "CREATE TABLE user_tokens (id INTEGER NOT NULL, token_digest VARCHAR(64) NOT NULL, user_id INTEGER NOT NULL, "
+    "created_at DATETIME NOT NULL, expires_at DATETIME NOT NULL, PRIMARY KEY (id), UNIQUE (token_digest), "
+    "FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE)",
+    "INSERT INTO users VALUES (1, 'test_superadmin', 'x', NULL, 'superadmin'), (2, 'alice', 'x', NULL, 'user')",
+    "INSERT INTO user_tokens VALUES (1, 'digest', 2, '2020-01-01 00:00:00', '2999-01-01 00:00:00')",
+)
+
+
+@pytest.fixture
+async def legacy_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata_obj.drop_all)
+        for statement in LEGACY_SCHEMA:
+            await conn.exec_driver_sql(statement)
+    yield engine
+    await engine.dispose()
+
+
+async def test_prepare_database_upgrades_legacy_schema(legacy_database):
+    await prepare_database()
+    # повторный запуск ничего не меняет
+    await prepare_database()
+
+    async with engine.connect() as conn:
+        def describe(sync_conn):
+            inspector = inspect(sync_conn)
+            return (
+                {column["name"] for column in inspector.get_columns("users")},
+                {index["name"] for index in inspector.get_indexes("users")},
+            )
+        columns, indexes = await conn.run_sync(describe)
+        tokens = (await conn.exec_driver_sql("SELECT id, user_id FROM user_tokens")).all()
+
+    assert "version" in columns
+    assert {"ix_users_role_id", "ix_users_role_username"} <= indexes
+    assert tokens == [(1, 2)]
+    assert [user.username for user in await get_all_users(limit=10, offset=0)] == ["test_superadmin", "alice"]
+
+    # счётчик изменений ведут триггеры, созданные для уже существующей таблицы
+    revision = await get_users_revision()
+    await add_new_user("bob", "Strong_Password_123%", "user")
+    assert await get_users_revision() == revision + 1
+    # смена только хеша пароля списки не меняет
+    assert await update_password_hash(2, "x", "y")
+    assert await get_users_revision() == revision + 1
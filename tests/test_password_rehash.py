@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from modules.db import jobs
+from modules.db.queryes import add_new_user, get_user_data, update_password_hash
+from modules.hashing_service import hashing_service
+from modules.secrets_manager import build_pwd_context
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Strong_Password_123%"
+
+
+async def set_password_hash(username: str, new_hash: str) -> int:
+    user = await get_user_data(username, use_primary=True, with_password=True)
+    assert await update_password_hash(user.id, user.password, new_hash)
+    return user.id
+
+
+async def stored_hash(username: str) -> str:
+    return (await get_user_data(username, use_primary=True, with_password=True)).password
+
+
+async def test_login_rehashes_in_background(client, monkeypatch):
+    await add_new_user("alice", PASSWORD, "user")
+    old_hash = build_pwd_context(["bcrypt"], bcrypt_rounds=5).hash(PASSWORD)
+    await set_password_hash("alice", old_hash)
+
+    release = asyncio.Event()
+    original_hash = hashing_service.hash
+
+    async def slow_hash(password):
+        await release.wait()
+        return await original_hash(password)
+
+    monkeypatch.setattr(hashing_service, "hash", slow_hash)
+
+    # ответ приходит, пока перехеширование ещё ждёт
+    response = await client.post("/api/auth", json={"username": "alice", "password": PASSWORD})
+    assert response.status_code == 200
+    assert await stored_hash("alice") == old_hash
+
+    release.set()
+    await asyncio.gather(*jobs._rehash_tasks)
+    new_hash = await stored_hash("alice")
+    assert new_hash != old_hash
+    assert new_hash.startswith("$2b$04$")
+
+
+async def test_hash_of_unknown_scheme_is_rejected(client):
+    await add_new_user("alice", PASSWORD, "user")
+    await set_password_hash("alice", build_pwd_context(["pbkdf2_sha256"]).hash(PASSWORD))
+
+    response = await client.post("/api/auth", json={"username": "alice", "password": PASSWORD})
+
+    assert response.status_code == 403
+
+
+def test_bcrypt_hashes_verify_with_other_schemes():
+    bcrypt_hash = build_pwd_context(["bcrypt"], bcrypt_rounds=4).hash(PASSWORD)
+    context = build_pwd_context(["pbkdf2_sha256"])
+
+    assert context.verify(PASSWORD, bcrypt_hash)
+    assert context.needs_update(bcrypt_hash)
+    assert context.hash(PASSWORD).startswith("$pbkdf2-sha256$")
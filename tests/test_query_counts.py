@@ -0,0 +1,50 @@
+"""
+Число SQL-команд на изменяющие запросы: изменение и удаление пользователя должны
+обходиться одной командой записи (UPDATE/DELETE ... RETURNING) без предварительных SELECT.
+"""
+import pytest
+from sqlalchemy import event
+
+from modules.db.queryes import add_new_user
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Strong_Password_123%"
+
+
+@pytest.fixture
+def statements(database):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # журнал аудита пишется в фоне и к запросу не относится
+        if "audit_log" not in statement:
+            executed.append(statement.split(None, 1)[0].upper())
+
+    event.listen(database.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(database.sync_engine, "before_cursor_execute", record)
+
+
+async def test_edit_user_is_one_statement(client, statements):
+    await add_new_user("alice", PASSWORD, "user")
+    statements.clear()
+
+    response = await client.patch(
+        "/api/users/edit_user",
+        json={"username": "alice", "new_username": "alice2", "email": "alice@example.com"},
+    )
+
+    assert response.status_code == 200
+    assert statements == ["UPDATE"]
+
+
+async def test_delete_user_is_one_statement(client, statements):
+    await add_new_user("alice", PASSWORD, "user")
+    statements.clear()
+
+    response = await client.delete("/api/users/delete_user", params={"username": "alice"})
+
+    assert response.status_code == 200
+    assert statements == ["DELETE"]
+
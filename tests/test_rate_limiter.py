@@ -0,0 +1,113 @@
+import pytest
+
+from modules import rate_limiter
+from modules.rate_limiter import FailureLockout, LoginThrottle, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_burst_and_refill(clock):
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    # другие ключи не затрагиваются
+    assert limiter.acquire("b") == 0
+
+    clock.now += 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+    clock.now += 100
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+
+
+def test_token_bucket_evicts_least_recently_used(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")
+    limiter.acquire("c")
+
+    assert len(limiter) == 2
+    # "a" использовался недавно и остался пустым, "b" вытеснен и начинает с полного bucket
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0
+
+
+def test_failure_lockout_locks_after_max_failures(clock):
+    lockout = FailureLockout(max_failures=3, window=60, lockout=300)
+    for _ in range(2):
+        lockout.record_failure("a")
+    assert lockout.retry_after("a") == 0
+    assert lockout.has_recent_failures("a")
+
+    lockout.record_failure("a")
+    assert lockout.retry_after("a") == pytest.approx(300)
+
+    clock.now += 300
+    assert lockout.retry_after("a") == 0
+    assert not lockout.has_recent_failures("a")
+
+
+def test_failure_lockout_window_and_reset(clock):
+    lockout = FailureLockout(max_failures=3, window=60, lockout=300)
+    lockout.record_failure("a")
+    lockout.record_failure("a")
+    clock.now += 61
+    assert not lockout.has_recent_failures("a")
+
+    # старые неудачи вышли из окна и не считаются
+    lockout.record_failure("a")
+    assert lockout.retry_after("a") == 0
+
+    lockout.record_failure("a")
+    lockout.reset("a")
+    lockout.record_failure("a")
+    assert lockout.retry_after("a") == 0
+
+
+@pytest.fixture
+def throttle(clock, monkeypatch):
+    for name, value in {"USERNAME_MAX_FAILURES": "3", "IP_MAX_FAILURES": "5", "IP_BURST": "1000", "USERNAME_BURST": "1000"}.items():
+        monkeypatch.setenv(f"RATE_LIMIT_TEST_{name}", value)
+    return LoginThrottle("test")
+
+
+def test_failures_from_another_ip_do_not_lock_out_user(throttle):
+    for _ in range(3):
+        throttle.record_failure("10.0.0.1", "admin")
+
+    assert throttle.check("10.0.0.1", "admin") > 0
+    assert throttle.check("10.0.0.2", "admin") == 0
+
+
+def test_locked_ip_still_allows_clean_username(throttle):
+    for number in range(5):
+        throttle.record_failure("10.0.0.1", f"user{number}")
+
+    assert throttle.check("10.0.0.1", "user0") > 0
+    assert throttle.check("10.0.0.1", "admin") == 0
+
+
+def test_success_resets_failures(throttle):
+    for _ in range(2):
+        throttle.record_failure("10.0.0.1", "admin")
+    throttle.record_success("10.0.0.1", "admin")
+    for _ in range(2):
+        throttle.record_failure("10.0.0.1", "admin")
+
+    assert throttle.check("10.0.0.1", "admin") == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from modules.db.queryes import add_new_user
+from modules.shared_state import SharedCounters
+from modules.token_cache import TokenCache
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "Strong_Password_123%"
+
+
+async def login_admin(client) -> dict:
+    await add_new_user("bob", PASSWORD, "admin")
+    response = await client.post("/api/auth", json={"username": "bob", "password": PASSWORD})
+    assert response.status_code == 200
+    headers = {"x-api-token": response.json()["x_api_token"]}
+
+    # токен попадает в кэш при первом запросе
+    response = await client.get("/api/users/get_list", headers=headers)
+    assert response.status_code == 200
+    return headers
+
+
+async def test_demoted_user_loses_access(client):
+    headers = await login_admin(client)
+
+    response = await client.patch("/api/users/edit_user", json={"username": "bob", "role": "user"})
+    assert response.status_code == 200
+
+    response = await client.get("/api/users/get_list", headers=headers)
+    assert response.status_code == 403
+
+
+async def test_deleted_user_loses_access(client):
+    headers = await login_admin(client)
+
+    response = await client.delete("/api/users/delete_user", params={"username": "bob"})
+    assert response.status_code == 200
+
+    response = await client.get("/api/users/get_list", headers=headers)
+    assert response.status_code == 403
+
+
+def test_invalidation_in_another_worker(tmp_path):
+    path = str(tmp_path / "shared.state")
+    first, second = TokenCache(counters=SharedCounters(path)), TokenCache(counters=SharedCounters(path))
+    first.set("token", 1, "bob", "admin")
+    second.set("token", 1, "bob", "admin")
+
+    second.invalidate_user("bob")
+
+    assert second.get("token") is None
+    assert first.get("token") is None
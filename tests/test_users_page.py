@@ -0,0 +1,49 @@
+import base64
+import json
+
+import pytest
+
+from modules.db.queryes import add_new_user
+
+pytestmark = pytest.mark.anyio
+
+
+def cursor(*payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+async def test_next_cursor_continues_page(client):
+    await add_new_user("alice", "Strong_Password_123%", "user")
+    first = await client.get("/api/users/get_page", params={"limit": 1, "order_by": "username"})
+    assert first.status_code == 200
+
+    response = await client.get("/api/users/get_page", params={"cursor": first.json()["next_cursor"], "order_by": "username"})
+    assert response.status_code == 200
+    assert [user["username"] for user in first.json()["items"] + response.json()["items"]] == ["alice", "test_superadmin"]
+
+
+@pytest.mark.parametrize("order_by, last_value", [
+    ("id", {"a": 1}),
+    ("id", [1]),
+    ("id", True),
+    ("id", "1"),
+    ("id", 10**30),
+    ("id", -2**63 - 1),
+    ("username", 1),
+    ("username", ["alice"]),
+    ("role", "owner"),
+    ("role", None),
+])
+async def test_malformed_cursor_is_bad_request(client, order_by, last_value):
+    response = await client.get(
+        "/api/users/get_page",
+        params={"cursor": cursor(order_by, False, last_value, 1), "order_by": order_by},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_cursor_with_too_large_id_is_bad_request(client):
+    response = await client.get("/api/users/get_page", params={"cursor": cursor("username", False, "alice", 2**63)})
+
+    assert response.status_code == 400